@@ -1,13 +1,21 @@
 # api_server.py
 import logging
+import threading
 from flask import Flask, jsonify, request
-from evaluation.generate_reports import generate_reports
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("api")
 
 app = Flask(__name__)
 
+# Nur ein generate_reports() gleichzeitig. Anfragen waehrend eines Laufs warten auf dessen
+# Ende und bekommen sein Ergebnis; einen Folgelauf braucht es nicht, denn generate_reports()
+# drosselt selbst (_MIN_REGEN_INTERVAL) und meldet dann ReportsClean.
+_update_cond = threading.Condition()
+_update_running = False
+_update_generation = 0       # Anzahl abgeschlossener Laeufe
+_last_error = None
+
 @app.after_request
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
@@ -19,12 +27,47 @@ def add_cors_headers(response):
 @app.route("/api/update", methods=["POST"])
 def update():
     """Update reports endpoint"""
+    global _update_running, _update_generation, _last_error
+
+    with _update_cond:
+        if _update_running:
+            # laufenden Durchgang mitnutzen statt parallel zu generieren
+            target = _update_generation + 1
+            while _update_generation < target:
+                _update_cond.wait()
+            return _update_response(_last_error)
+        _update_running = True
+
+    error = "Update abgebrochen"  # gilt, falls eine BaseException den Lauf beendet
     try:
-        generate_reports()
-        return jsonify({"ok": True}), 200
+        # pandas/matplotlib erst beim ersten Update laden -> schneller Server-Start
+        from evaluation.exceptions import ReportsClean
+        from evaluation.generate_reports import generate_reports
+        try:
+            generate_reports()
+        except ReportsClean as e:
+            # gedrosselt: Reports sind aktuell genug -> kein Fehler
+            log.info("%s", e)
+        error = None
     except Exception as e:
         log.exception("Update fehlgeschlagen")
-        return jsonify({"ok": False, "error": str(e)}), 500
+        error = str(e)
+    finally:
+        # immer freigeben, sonst warten alle weiteren Anfragen ewig
+        with _update_cond:
+            _last_error = error
+            _update_generation += 1
+            _update_running = False
+            _update_cond.notify_all()
+
+    return _update_response(error)
+
+
+def _update_response(error):
+    """JSON-Antwort fuer /api/update."""
+    if error is not None:
+        return jsonify({"ok": False, "error": error}), 500
+    return jsonify({"ok": True}), 200
 
 
 @app.errorhandler(404)
@@ -41,4 +84,5 @@ def internal_error(error):
 
 
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=8001, debug=False)
+    # threaded: jede Anfrage in eigenem Thread, ein laufendes Update blockiert den Server nicht
+    app.run(host="127.0.0.1", port=8001, debug=False, threaded=True)
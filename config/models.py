@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import json
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 
 
 Number = Union[int, float]
@@ -26,6 +26,15 @@ def _to_tuple2(value: Any) -> Tuple[Optional[float], Optional[float]]:
         return (None if a is None else float(a), None if b is None else float(b))
     return (None, None)
 
+# Bool-Strings -> fertiges (value, is_good); ein Dict-Lookup statt Vergleichskette
+_TRUE: Tuple[int, bool] = (1, True)
+_FALSE: Tuple[int, bool] = (0, True)
+_BOOL_STRINGS: Dict[str, Tuple[int, bool]] = {
+    **dict.fromkeys(("true", "1", "yes", "y", "on", "ok"), _TRUE),
+    **dict.fromkeys(("false", "0", "no", "n", "off", "low"), _FALSE),
+}
+
+
 def _parse_bool(v: Any) -> Tuple[Optional[int], bool]:
     """
     Returns (value, is_good) where:
@@ -33,23 +42,24 @@ def _parse_bool(v: Any) -> Tuple[Optional[int], bool]:
     - is_good: True if input was valid (could parse as bool)
     Accepts True/False, 0/1, "true"/"false", "0"/"1".
     """
+    t = type(v)
+    if t is bool:  # vor int pruefen (bool ist Subklasse von int)
+        return _TRUE if v else _FALSE
+    if t is str:
+        # Payloads liefern fast immer schon "ok"/"true"/... -> ohne strip()/lower()-Kopie
+        r = _BOOL_STRINGS.get(v)
+        if r is not None:
+            return r
+        return _BOOL_STRINGS.get(v.strip().lower(), (None, False))
     if v is None:
         return (None, False)
-    if isinstance(v, bool):
-        return (1 if v else 0, True)
     if isinstance(v, (int, float)):
         if v == 0:
-            return (0, True)
+            return _FALSE
         if v == 1:
-            return (1, True)
+            return _TRUE
         # invalid numeric value for bool
         return (None, False)
-    if isinstance(v, str):
-        s = v.strip().lower()
-        if s in ("true", "1", "yes", "y", "on", "ok"):
-            return (1, True)
-        if s in ("false", "0", "no", "n", "off", "low"):
-            return (0, True)
     return (None, False)
 
 
@@ -57,6 +67,10 @@ def _parse_bool(v: Any) -> Tuple[Optional[int], bool]:
 # Models
 # ---------------------------
 
+# (value, is_good) fuer ungueltige Werte -> einmalig statt pro Aufruf gebaut
+_BAD: Tuple[Any, bool] = (None, False)
+
+
 @dataclass
 class Sensor:
     key: str                         # key in JSON under SENSORS, e.g. "temperature1"
@@ -75,6 +89,36 @@ class Sensor:
     color: Optional[str] = None
     invalid_map: Dict[str, Any] = field(default_factory=dict)
 
+    # vorberechneter Format-String fuer Anzeige (siehe evaluation.utils.fmt)
+    fmt_str: str = field(default="{}", init=False, repr=False, compare=False)
+
+    # vorberechneter Typ fuer sanitize_value (statt lower()/"array" pro Aufruf)
+    _ftype: str = field(default="string", init=False, repr=False, compare=False)
+    _is_array: bool = field(default=False, init=False, repr=False, compare=False)
+    _convert: Callable[[Any, bool], Tuple[Any, bool]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        num = "{}"
+        if self.round is not None:
+            try:
+                num = f"{{:.{int(self.round)}f}}"
+            except (TypeError, ValueError):
+                # ungueltiges ROUND betrifft nur die Anzeige -> unformatiert, Config-Laden geht weiter
+                pass
+        self.fmt_str = f"{num} {self.unit}" if self.unit else num
+        self._ftype = (self.field_type or "string").lower()
+        self._is_array = "array" in self._ftype
+        # Typ-Konverter einmal waehlen statt pro Wert die field_type-Kette zu pruefen
+        self._convert = {
+            "bool_array": self._conv_bool_array,
+            "int_array": self._conv_int_array,
+            "float": self._conv_float, "double": self._conv_float, "number": self._conv_float,
+            "int": self._conv_int, "integer": self._conv_int,
+            "bool": self._conv_bool, "boolean": self._conv_bool,
+        }.get(self._ftype, self._conv_string)
+        # invalid_map Keys einmal normalisieren -> Lookup ohne strip() fuer Zahlen
+        self.invalid_map = {str(k).strip(): v for k, v in self.invalid_map.items()}
+
     def __repr__(self) -> str:
         return f"Sensor(key={self.key}, alias={self.alias}, type={self.field_type}, unit={self.unit}, factor={self.factor}, round={self.round}, limits={self.limits}, warn={self.warn}, alarm={self.alarm}, plot_limits={self.plot_limits}, color={self.color}, invalid_map={self.invalid_map})"
 
@@ -101,32 +145,28 @@ class Sensor:
         Apply invalid_map, convert to target type, and round.
         Returns (value, is_good) where value may be None.
         """
-        # ---- helpers -----------------------------------------------------------
-        def mark_bad(value: Any = None) -> Tuple[Any, bool]:
-            return (value, False)
-
         # ---- 0) None -----------------------------------------------------------
         if raw is None:
-            return mark_bad(None)
+            return _BAD
         
-        # ---- type conversion ------------------------------------------------
-        t = (self.field_type or "string").lower()
+        is_array = self._is_array
         
         # ---- 2) normalize list/tuple payloads for non-array types -----------
         # Take first element of tuple/list for numeric types (but NOT for arrays)
-        if isinstance(raw, (list, tuple)) and len(raw) > 0 and "array" not in t:
+        if not is_array and isinstance(raw, (list, tuple)) and len(raw) > 0:
             raw = raw[0]
         #print("Debug: first element:", raw, " type:", type(raw).__name__)
 
-        # ---- 1) invalid_map (string key compare) - skip for arrays -----------
-        if "array" not in t:
-            key = str(raw).strip()
+        # ---- 1) invalid_map (string key compare) - skip for arrays / empty map
+        if not is_array and self.invalid_map:
+            # str(int/float) hat nie Whitespace -> strip() nur fuer Strings
+            key = raw.strip() if type(raw) is str else str(raw)
             #print("sanitize raw:", raw, "key:", key, " type:", self.field_type, " invalid_map:", self.invalid_map)
             if key in self.invalid_map:
                 raw = self.invalid_map[key]
                 # If mapping leads to None => invalid
                 if raw is None:
-                    return mark_bad(None)
+                    return _BAD
                 # Otherwise: value exists; you can decide if "mapped" counts as good.
                 # Here we treat mapped replacements as good:
                 # (If you want "mapped always bad", set mapped_good=False.)
@@ -136,84 +176,88 @@ class Sensor:
         else:
             mapped_good = True
 
-        # ---- 3) type conversion ------------------------------------------------
+        # ---- 3) type conversion (Konverter einmal in __post_init__ gewaehlt) ----
+        return self._convert(raw, mapped_good)
 
-        if t in ("bool_array",):
-            # Expects a list of booleans, stores as JSON
-            if not isinstance(raw, (list, tuple)):
-                return mark_bad(None)
-            try:
-                # Convert each element to bool using _parse_bool
-                bool_list = []
-                for item in raw:
-                    b, ok = _parse_bool(item)
-                    if not ok:
-                        return mark_bad(None)  # Invalid bool in array
-                    bool_list.append(b)
-                # Store as JSON string
-                result = json.dumps(bool_list)
-                return (result, mapped_good)
-            except Exception:
-                return mark_bad(None)
-
-        if t in ("int_array",):
-            # Expects a list of integers, stores as JSON
-            if not isinstance(raw, (list, tuple)):
-                return mark_bad(None)
-            try:
-                # Convert each element to int
-                int_list = []
-                for item in raw:
-                    try:
-                        val = int(float(item) * self.factor)
-                        int_list.append(val)
-                    except (TypeError, ValueError):
-                        return mark_bad(None)  # Invalid int in array
-                # Store as JSON string
-                result = json.dumps(int_list)
-                return (result, mapped_good)
-            except Exception:
-                return mark_bad(None)
+    # ---- type converters: (raw, mapped_good) -> (value, is_good) ------------
 
-        if t in ("float", "double", "number"):
-            try:
-                val = float(raw)
-            except Exception:
-                return mark_bad(None)
-
-            # Apply factor
-            val = val * self.factor
+    def _conv_bool_array(self, raw: Any, mapped_good: bool) -> Tuple[Any, bool]:
+        # Expects a list of booleans, stores as JSON
+        if not isinstance(raw, (list, tuple)):
+            return _BAD
+        try:
+            # Convert each element to bool using _parse_bool
+            bool_list = []
+            for item in raw:
+                b, ok = _parse_bool(item)
+                if not ok:
+                    return _BAD  # Invalid bool in array
+                bool_list.append(b)
+            # Store as JSON string
+            result = json.dumps(bool_list)
+            return (result, mapped_good)
+        except Exception:
+            return _BAD
 
-            if self.round is not None:
+    def _conv_int_array(self, raw: Any, mapped_good: bool) -> Tuple[Any, bool]:
+        # Expects a list of integers, stores as JSON
+        if not isinstance(raw, (list, tuple)):
+            return _BAD
+        try:
+            # Convert each element to int
+            int_list = []
+            for item in raw:
                 try:
-                    val = round(val, int(self.round))
-                except Exception:
-                    # value is still usable, but rounding config is bad
-                    return (val, False)
+                    val = int(float(item) * self.factor)
+                    int_list.append(val)
+                except (TypeError, ValueError):
+                    return _BAD  # Invalid int in array
+            # Store as JSON string
+            result = json.dumps(int_list)
+            return (result, mapped_good)
+        except Exception:
+            return _BAD
 
-            return (val, mapped_good)
+    def _conv_float(self, raw: Any, mapped_good: bool) -> Tuple[Any, bool]:
+        try:
+            val = float(raw)
+        except Exception:
+            return _BAD
 
-        if t in ("int", "integer"):
+        # Apply factor
+        val = val * self.factor
+
+        if self.round is not None:
             try:
-                # allows "12.0" -> 12
-                val = float(raw) * self.factor
-                val = int(val)
+                val = round(val, int(self.round))
             except Exception:
-                return mark_bad(None)
-            return (val, mapped_good)
+                # value is still usable, but rounding config is bad
+                return (val, False)
+
+        return (val, mapped_good)
+
+    def _conv_int(self, raw: Any, mapped_good: bool) -> Tuple[Any, bool]:
+        try:
+            # allows "12.0" -> 12
+            val = float(raw) * self.factor
+            val = int(val)
+        except Exception:
+            return _BAD
+        return (val, mapped_good)
 
-        if t in ("bool", "boolean"):
-            b, ok = _parse_bool(raw)
-            return (b, mapped_good and ok)
+    def _conv_bool(self, raw: Any, mapped_good: bool) -> Tuple[Any, bool]:
+        b, ok = _parse_bool(raw)
+        return (b, mapped_good and ok)
 
+    def _conv_string(self, raw: Any, mapped_good: bool) -> Tuple[Any, bool]:
         # default: string
         try:
             s = str(raw).strip()
         except Exception:
-            return mark_bad(None)
+            return _BAD
 
         if s == "":
-            return mark_bad(None)
+            return _BAD
 
         return (s, mapped_good)
 
@@ -271,6 +315,15 @@ class TableConfig:
     timestamp: TimestampConfig
     sensors: Dict[str, Sensor] = field(default_factory=dict)
 
+    # vorberechnet: (key, Sensor) Paare in Spaltenreihenfolge und Alias-Index
+    sensor_items: Tuple[Tuple[str, Sensor], ...] = field(default=(), init=False, repr=False, compare=False)
+    _sensors_by_alias: Dict[str, Sensor] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.sensor_items = tuple(self.sensors.items())
+        for s in self.sensors.values():
+            self._sensors_by_alias.setdefault(s.alias, s)
+
     @staticmethod
     def from_dict(key: str, d: Dict[str, Any]) -> "TableConfig":
         ts = TimestampConfig.from_dict(d.get("TIMESTAMP", {}) or {})
@@ -292,10 +345,7 @@ class TableConfig:
         return self.sensors.get(sensor_key)
 
     def get_sensor_by_alias(self, alias: str) -> Optional[Sensor]:
-        for s in self.sensors.values():
-            if s.alias == alias:
-                return s
-        return None
+        return self._sensors_by_alias.get(alias)
 
 
 @dataclass
@@ -304,6 +354,8 @@ class MqttBrokerConfig:
     port: int = 1883
     topic: str = "mobilealerts/+/json"
     compact_log_enabled: bool = False
+    log_level: str = "INFO"         # DEBUG -> jede Nachricht loggen (kompakt/voll je nach COMPACT_LOG_ENABLED)
+    max_payload_bytes: int = 8192   # groessere Payloads werden ohne Parsen verworfen
 
     @staticmethod
     def from_dict(d: Dict[str, Any]) -> "MqttBrokerConfig":
@@ -311,7 +363,9 @@ class MqttBrokerConfig:
             host=d.get("HOST", "127.0.0.1"),
             port=int(d.get("PORT", 1883)),
             topic=d.get("TOPIC", "mobilealerts/+/json"),
-            compact_log_enabled=bool(d.get("COMPACT_LOG_ENABLED", False))
+            compact_log_enabled=bool(d.get("COMPACT_LOG_ENABLED", False)),
+            log_level=str(d.get("LOG_LEVEL", "INFO")).upper(),
+            max_payload_bytes=int(d.get("MAX_PAYLOAD_BYTES", 8192)),
         )
 
 
@@ -337,6 +391,13 @@ class SystemConfig:
         self.ntfy: NtfyConfig = NtfyConfig.from_dict(cfg.get("NTFY", {}) or {})
         self.tables: Dict[str, TableConfig] = tables
 
+        # Lookup-Indizes (O(1) statt Scan ueber alle Tabellen); bei Duplikaten gewinnt die erste
+        self._tables_by_alias: Dict[str, TableConfig] = {}
+        self._tables_by_sensor_id: Dict[str, TableConfig] = {}
+        for t in tables.values():
+            self._tables_by_alias.setdefault(t.alias, t)
+            self._tables_by_sensor_id.setdefault(t.sensor_id, t)
+
     @staticmethod
     def load(path: str) -> "SystemConfig":
         """Load SystemConfig from file (static method for compatibility)."""
@@ -346,16 +407,10 @@ class SystemConfig:
         return self.tables.get(table_key)
     
     def get_table_by_alias(self, alias: str) -> Optional[TableConfig]:
-        for t in self.tables.values():
-            if t.alias == alias:
-                return t
-        return None
+        return self._tables_by_alias.get(alias)
     
     def get_table_by_sensor_id(self, sensor_id: str) -> Optional[TableConfig]:
-        for t in self.tables.values():
-            if t.sensor_id == sensor_id:
-                return t
-        return None
+        return self._tables_by_sensor_id.get(sensor_id)
     
     def get_sensor_by_key(self, table_key, sensor_key: str) -> Optional[Sensor]:
         table = self.get_table_by_key(table_key)
@@ -418,6 +473,9 @@ class MailConfig:
     sender: str = ""
     recipient: str = ""
     payload_preview_chars: int = 1800
+    smtp_host: str = "localhost"
+    smtp_port: int = 25
+    use_local_mail: bool = False   # True -> lokales `mail` Kommando (z.B. msmtp) statt SMTP
 
     @staticmethod
     def from_dict(d: Dict[str, Any]) -> "MailConfig":
@@ -426,6 +484,9 @@ class MailConfig:
             sender=d.get("SENDER", ""),
             recipient=d.get("RECIPIENT", ""),
             payload_preview_chars=int(d.get("PAYLOAD_PREVIEW_CHARS", 1800)),
+            smtp_host=d.get("SMTP_HOST", "localhost"),
+            smtp_port=int(d.get("SMTP_PORT", 25)),
+            use_local_mail=bool(d.get("USE_LOCAL_MAIL", False)),
         )
 
 
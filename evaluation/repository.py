@@ -20,6 +20,10 @@ from evaluation.exceptions import ConfigError, DatabaseFileNotFound, TableNotFou
 FIG_WIDTH_TABLE = 7  # Standard Plot-Breite
 FIG_WIDTH_GRAPH = 10  # Breitere Plots für Graphen
 
+# db_file -> (Config-Signatur, PRAGMA schema_version) der letzten erfolgreichen Pruefung;
+# generate_reports baut pro Lauf ein neues Repository -> Schema nur bei Aenderung neu pruefen
+_validated_schema = {}
+
 def _parse_db_timestamp(ts: str) -> datetime:
     """Konvertiert DB-ISO-String '...Z' in datetime."""
     return datetime.fromisoformat(ts.rstrip("Z"))
@@ -31,10 +35,28 @@ class SensorRepository:
         validate_schema: Wenn True, wird beim Initialisieren das DB-Schema geprüft.
         """
         self.config = config
+        self._conn = None  # eine Verbindung fuer alle Abfragen (siehe _connect)
 
         if validate_schema:
             self._validate_schema()
 
+    def _connect(self):
+        """
+        Liefert die (lazy geoeffnete) Verbindung des Repositories.
+        Ein Report-Lauf macht viele Abfragen -> nicht pro Abfrage neu verbinden.
+        """
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.config.db_file, check_same_thread=False)
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.execute("PRAGMA cache_size=-64000")
+        return self._conn
+
+    def close(self):
+        """Verbindung schliessen (wird beim naechsten Zugriff neu geoeffnet)."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
     def _validate_schema(self):
         """
         Prüft:
@@ -61,10 +83,16 @@ class SensorRepository:
 
         inactive_tables = {}
 
-        conn = sqlite3.connect(cfg.db_file)
-        try:
-            cur = conn.cursor()
+        conn = self._connect()
+        cfg_sig = tuple(
+            (t.name, t.timestamp.name, tuple(t.sensors.keys())) for t in cfg.tables.values()
+        )
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        if _validated_schema.get(cfg.db_file) == (cfg_sig, schema_version):
+            return
 
+        cur = conn.cursor()
+        try:
             for table_key, tcfg in cfg.tables.items():
                 table_name = tcfg.name
                 ts_field = tcfg.timestamp.name
@@ -81,7 +109,7 @@ class SensorRepository:
                     continue
 
                 # 2b) Spalteninfos holen
-                cur.execute(f"PRAGMA table_info({table_name});")
+                cur.execute("SELECT name FROM pragma_table_info(?);", (table_name,))
                 columns_info = cur.fetchall()
                 if not columns_info:
                     inactive_tables[table_key] = (
@@ -89,7 +117,7 @@ class SensorRepository:
                     )
                     continue
 
-                column_names = {col[1] for col in columns_info}
+                column_names = {col[0] for col in columns_info}
 
                 # 2c) Timestamp-Feld vorhanden?
                 if ts_field not in column_names:
@@ -113,11 +141,13 @@ class SensorRepository:
                     continue
 
         finally:
-            conn.close()
+            cur.close()
 
         if inactive_tables:
             raise ColumnNotFound("Schema mismatch:\n" + "\n".join(f"{k}: {v}" for k,v in inactive_tables.items()))
 
+        _validated_schema[cfg.db_file] = (cfg_sig, schema_version)
+
     def get_table_id(self, table_key, by_alias=True):
         """
         Liefert den Tabellennamen für den angegebenen table_key.
@@ -156,13 +186,7 @@ class SensorRepository:
             FROM {table.name}
         """
 
-        conn = sqlite3.connect(self.config.db_file)
-        try:
-            cur = conn.cursor()
-            cur.execute(query)
-            row = cur.fetchone()
-        finally:
-            conn.close()
+        row = self._connect().execute(query).fetchone()
 
         return row[0] if row and row[0] is not None else 0
 
@@ -297,11 +321,7 @@ class SensorRepository:
 
         query += f" ORDER BY {ts_col} ASC;"
 
-        conn = sqlite3.connect(self.config.db_file)
-        try:
-            df = pd.read_sql_query(query, conn, params=params)
-        finally:
-            conn.close()
+        df = pd.read_sql_query(query, self._connect(), params=params)
 
         return table, sensor, df
 
@@ -973,13 +993,7 @@ class SensorRepository:
             FROM {table.name}
         """
 
-        conn = sqlite3.connect(self.config.db_file)
-        try:
-            cur = conn.cursor()
-            cur.execute(query)
-            row = cur.fetchone()
-        finally:
-            conn.close()
+        row = self._connect().execute(query).fetchone()
 
         return row[0] if row and row[0] is not None else None
 
@@ -996,13 +1010,7 @@ class SensorRepository:
             FROM {table.name}
         """
 
-        conn = sqlite3.connect(self.config.db_file)
-        try:
-            cur = conn.cursor()
-            cur.execute(query)
-            row = cur.fetchone()
-        finally:
-            conn.close()
+        row = self._connect().execute(query).fetchone()
 
         return row[0] if row and row[0] is not None else None
     
@@ -1027,17 +1035,10 @@ class SensorRepository:
         if ts is None:
             return None
 
-        # Fall 1: pandas Timestamp
-        if isinstance(ts, pd.Timestamp):
-            dt = ts.to_pydatetime()
-            return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        t = type(ts)
 
-        # Fall 2: datetime.datetime
-        if isinstance(ts, datetime):
-            return ts.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-
-        # Fall 3: String
-        if isinstance(ts, str):
+        # Fall 1 (haeufigster Fall): String
+        if t is str:
 
             # Wenn schon im Ziel-Format
             if ts.endswith("Z"):
@@ -1051,6 +1052,23 @@ class SensorRepository:
 
             return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
 
+        # Fall 2: pandas Timestamp
+        if t is pd.Timestamp:
+            dt = ts.to_pydatetime()
+            return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+        # Fall 3: datetime.datetime
+        if t is datetime:
+            return ts.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+        # Subklassen (selten) -> isinstance als Fallback
+        if isinstance(ts, str):
+            return self._convert_to_db_timestamp(str(ts))
+        if isinstance(ts, pd.Timestamp):
+            return ts.to_pydatetime().strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        if isinstance(ts, datetime):
+            return ts.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
         # Unbekannter Typ
         raise TypeError(f"Kann Timestamp nicht konvertieren: {ts} ({type(ts)})")
 
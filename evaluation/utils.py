@@ -56,42 +56,64 @@ def format_iso_timestamp(ts, fmt="%Y-%m-%d %H:%M"):
 
 # Schöne Formatierung mit Einheit
 def fmt(v, sensor):
-    if pd.isna(v):
+    # None / pd.NA / NaT explizit, NaN via v != v (schneller als pd.isna)
+    if v is None or v is pd.NA or v is pd.NaT or v != v:
         return "-"
-    unit = sensor.unit or ""
-    value_str = f"{v:.{sensor.round}f}"
-    return f"{value_str} {unit}" if unit else value_str
+    return sensor.fmt_str.format(v)
+
+# image_dir -> st_mtime_ns beim letzten Scan (Verzeichnisinhalt unveraendert -> kein Rescan)
+_image_dir_cache = {}
+
 
 def generate_image_json(image_dir, output_json="images.json", status_image="status.png"):
     """
     Erzeugt eine images.json Datei.
     - 'status_image' bleibt ein separates Feld
     - das Statusbild wird NICHT in der List 'plots' aufgeführt
+    - Verzeichnis wird nur neu gescannt, wenn sich dessen mtime geändert hat
+      (neue/gelöschte Dateien); die JSON wird nur bei Änderung neu geschrieben
     """
 
     image_dir = Path(image_dir)
 
-    # PNG-Dateien sammeln
-    png_files = sorted(
-        [f.name for f in image_dir.glob("*.png")],
-        key=lambda x: x.lower()
-    )
+    # JSON-Pfad bestimmen
+    json_path = image_dir / output_json
+    json_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Statusbild rausfiltern
-    plots = [f for f in png_files if f != status_image]
+    cache_key = (str(image_dir), output_json, status_image)
+    dir_mtime = image_dir.stat().st_mtime_ns
+    if _image_dir_cache.get(cache_key) == dir_mtime and json_path.exists():
+        return
+
+    # PNG-Dateien sammeln (Statusbild rausfiltern)
+    plots = sorted(
+        (f.name for f in image_dir.glob("*.png") if f.name != status_image),
+        key=str.lower
+    )
 
     data = {
         "status_image": status_image,
         "plots": plots
     }
 
-    # JSON-Pfad bestimmen
-    json_path = image_dir / output_json
-    json_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # JSON schreiben
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-    print(f"📄 images.json erzeugt: {json_path}")
-    #print(f"   {len(plots)} Plotbilder gefunden (Statusbild ausgeschlossen).")
\ No newline at end of file
+    content = json.dumps(data, indent=2)
+
+    # JSON nur schreiben, wenn sich der Inhalt geändert hat
+    try:
+        unchanged = json_path.read_text(encoding="utf-8") == content
+    except OSError:
+        unchanged = False
+
+    if not unchanged:
+        created = not json_path.exists()
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        print(f"📄 images.json erzeugt: {json_path}")
+        if created:
+            # neu angelegte JSON ändert die Verzeichnis-mtime -> neu lesen
+            dir_mtime = image_dir.stat().st_mtime_ns
+
+    # mtime von vor dem Scan merken: während des Scans hinzugekommene/gelöschte PNGs
+    # ändern sie danach noch und lösen beim nächsten Aufruf einen neuen Scan aus
+    _image_dir_cache[cache_key] = dir_mtime
+    #print(f"   {len(plots)} Plotbilder gefunden (Statusbild ausgeschlossen).")
@@ -27,18 +27,33 @@ import sys
 import time
 import json
 import datetime
+import heapq
+import logging
+import operator
+import queue
+import signal
 import sqlite3
 import subprocess
-from typing import Any, Dict, Optional, Set
+import threading
+from collections import defaultdict
+from typing import Any, Callable, DefaultDict, Dict, Optional, Sequence, Set, Tuple
 
 from paho.mqtt import client as mqtt
 
+try:
+    import orjson
+    _loads = orjson.loads  # akzeptiert bytes direkt, kein .decode() noetig
+except ImportError:
+    def _loads(b: bytes) -> Any:
+        return json.loads(b.decode("utf-8", errors="replace"))
+
 from config.models import SystemConfig, TableConfig
 from msg_sender import MessageSender
 from exceptions import (
     MQTTLoggerError,
     DatabaseError,
     ConfigError,
+    PayloadFormatError,
     InternalLoggerError,
 )
 
@@ -54,6 +69,93 @@ import ssl
 CONFIG_SENSOR_PATH = "config/sensor_config.json"
 CONFIG_MESSAGE_PATH = "config/msg_config.json"
 
+log = logging.getLogger("mqtt_logger")
+
+TOPIC_PREFIX = "mobilealerts/"
+TOPIC_PREFIX_LEN = len(TOPIC_PREFIX)
+
+# Periodische Checks (Heap-Scheduler in start())
+CHECK_INTERVAL_S = 60       # rx summary, missing data, bad values, info mail
+FIRST_CHECK_DELAY_S = 60    # erster Durchlauf aller Checks nach dem Start
+
+# Writer-Thread (DB-Schreiben getrennt vom MQTT-Empfang)
+WRITE_QUEUE_MAX = 10000     # mehr wartende Records -> DatabaseError (Alarm)
+WRITER_BATCH_MAX = 200      # max. Records pro Durchgang ...
+WRITER_MAX_WAIT_S = 0.05    # ... bzw. max. Wartezeit, dann flush
+WRITER_JOIN_TIMEOUT_S = 120  # Stop: laenger als busy_timeout (30 s) + wal_checkpoint(TRUNCATE)
+
+DB_PRAGMAS = (
+    "PRAGMA busy_timeout=30000",  # SQLite wartet selbst (in C) bei Locks, statt Python-Retry
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA wal_autocheckpoint=1000",       # Seiten, danach passiver Checkpoint beim Commit
+    "PRAGMA journal_size_limit=67108864",   # -wal nach Checkpoint auf 64 MB kuerzen
+)
+
+# voruebergehende Fehler (Lock, Platte voll, IO): Records bleiben gepuffert und werden
+# beim naechsten flush erneut geschrieben; alle anderen (z.B. "no such table") -> verwerfen
+DB_RETRY_ERRORCODES = frozenset(
+    (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED, sqlite3.SQLITE_FULL, sqlite3.SQLITE_IOERR)
+)
+
+# Wartung der Schreib-Verbindung (laeuft im Writer-Thread, der die Verbindung besitzt)
+WAL_CHECKPOINT_INTERVAL_S = 3600    # PRAGMA wal_checkpoint(TRUNCATE)
+DB_OPTIMIZE_INTERVAL_S = 86400      # PRAGMA optimize
+
+
+# Alarm-Texte: Platzhalter {host}/{port}/{topic}/{db} kommen aus MQTTLogger._body_ctx,
+# der Rest wird erst gefuellt, wenn die Meldung nicht gedrosselt ist
+EXCEPTION_TMPL = (
+    "Exception im MQTT Logger\n"
+    "Exception: {exc_name}\n"
+    "Sensor-ID: {sid}\n"
+    "Topic: {msg_topic}\n"
+    "Zeit: {now_iso}\n"
+    "Fehler: {exc}\n"
+    "Count: {count}\n"
+    "DB: {db}\n"
+    "Broker: {host}:{port}\n"
+    "Topic-Filter: {topic}\n"
+)
+MISSING_DATA_TMPL = (
+    "Seit {hours} Stunden keine neuen Daten!\n"
+    "Sensor-ID: {sid}\n"
+    "Tabelle: {table}\n"
+    "Letzter Empfang: {last_ts}\n"
+    "Broker: {host}:{port}\n"
+    "Topic: {topic}\n"
+    "DB: {db}\n"
+)
+BAD_VALUES_TMPL = (
+    "BAD VALUES erkannt (invalid_map -> NULL)!\n\n"
+    "Sensor-ID: {sid}\n"
+    "Tabelle: {table}\n"
+    "Anzahl bad-field hits in {window_min} min Fenster: {count}\n"
+    "Broker: {host}:{port}\n"
+    "Topic: {topic}\n"
+    "DB: {db}\n"
+)
+DB_SIZE_CRITICAL_TMPL = (
+    "DB Groesse Kritisch: {size_mb:.1f} MB\n"
+    "BD Kritische Schwelle: {limit} MB)\n"
+    "DB: {db}\n"
+)
+DB_SIZE_WARNING_TMPL = (
+    "DB Groesse Warnung: {size_mb:.1f} MB\n"
+    "BD Warn Schwelle: {limit} MB)\n"
+    "DB: {db}\n"
+)
+INFO_TMPL = (
+    "Logger laeuft.\n"
+    "Zeit: {now_iso}\n"
+    "Broker: {host}:{port}\n"
+    "Topic: {topic}\n"
+    "DB: {db}\n"
+    "Empfangs-Statistik:\n"
+    "{stats}\n"
+)
 
 # --------------------------
 # Helpers (strict)
@@ -89,31 +191,36 @@ def get_db_size_bytes(db_file: str) -> int:
         raise DatabaseError(f"Failed to get DB file size '{db_file}': {e}") from e
 
 
-def get_table_columns(db_file: str, table: str) -> Set[str]:
-    try:
-        conn = sqlite3.connect(db_file, timeout=5)
-        try:
-            cur = conn.cursor()
-            cur.execute(f'PRAGMA table_info("{table}")')
-            rows = cur.fetchall()
-            return {r[1] for r in rows}  # column name
-        finally:
-            conn.close()
-    except sqlite3.Error as e:
-        raise DatabaseError(f"Failed to read schema for table '{table}': {e}") from e
+def _columns(cur: sqlite3.Cursor, table: str) -> Set[str]:
+    # Tabellenname als Parameter (table-valued pragma) statt ins SQL formatiert
+    cur.execute("SELECT name FROM pragma_table_info(?)", (table,))
+    return {r[0] for r in cur.fetchall()}
 
 
 def check_schema(db_file: str, tables: Dict[str, TableConfig]) -> Dict[str, str]:
     """
     Rueckgabe: table_key -> problem_text (nur wenn etwas fehlt)
+    Eine Verbindung fuer alle Tabellen.
     """
     problems: Dict[str, str] = {}
-    for tkey, tcfg in tables.items():
-        expected = {tcfg.timestamp.name} | set(tcfg.sensors.keys())
-        actual = get_table_columns(db_file, tcfg.name)
-        missing = sorted(expected - actual)
-        if missing:
-            problems[tkey] = f"Table '{tcfg.name}' missing columns: {', '.join(missing)}"
+    try:
+        conn = sqlite3.connect(db_file, timeout=5)
+    except sqlite3.Error as e:
+        raise DatabaseError(f"Failed to open DB '{db_file}' for schema check: {e}") from e
+
+    try:
+        cur = conn.cursor()
+        for tkey, tcfg in tables.items():
+            expected = {tcfg.timestamp.name} | set(tcfg.sensors.keys())
+            try:
+                actual = _columns(cur, tcfg.name)
+            except sqlite3.Error as e:
+                raise DatabaseError(f"Failed to read schema for table '{tcfg.name}': {e}") from e
+            missing = sorted(expected - actual)
+            if missing:
+                problems[tkey] = f"Table '{tcfg.name}' missing columns: {', '.join(missing)}"
+    finally:
+        conn.close()
     return problems
 
 def _avg_minutes(dt_seconds: float, n_intervals: int) -> Optional[float]:
@@ -121,55 +228,209 @@ def _avg_minutes(dt_seconds: float, n_intervals: int) -> Optional[float]:
         return None
     return (dt_seconds / n_intervals) / 60.0
 
+# (table_key, table_name, timestamp_name, getter, fields, sanitizers) pro sensor_id
+Route = Tuple[
+    str, str, str,
+    Callable[[Dict[str, Any]], Tuple[Any, ...]],
+    Tuple[str, ...],
+    Tuple[Callable[[Any], Tuple[Any, bool]], ...],
+]
+
 # --------------------------
 # DB
 # --------------------------
 
+def open_db(db_file: str) -> sqlite3.Connection:
+    """
+    Eine gemeinsame Schreib-Verbindung (WAL) fuer alle Tabellen.
+    autocommit -> Transaktionen explizit via BEGIN/COMMIT.
+    """
+    try:
+        conn = sqlite3.connect(db_file, timeout=30, isolation_level=None, check_same_thread=False)
+        for pragma in DB_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    except sqlite3.Error as e:
+        raise DatabaseError(f"DB connect failed ({db_file}): {e}") from e
+
+
+def is_retryable(e: sqlite3.Error) -> bool:
+    """True, wenn der Fehler voruebergehend ist (DB_RETRY_ERRORCODES, erweiterte Codes inkl.)."""
+    code = getattr(e, "sqlite_errorcode", None)
+    return code is not None and (code & 0xFF) in DB_RETRY_ERRORCODES
+
+
+def run_pragma(conn: sqlite3.Connection, pragma: str):
+    """Wartungs-PRAGMA ausserhalb einer Transaktion ausfuehren (Ergebniszeilen verwerfen)."""
+    try:
+        conn.execute(pragma).fetchall()
+    except sqlite3.Error as e:
+        raise DatabaseError(f"{pragma} failed: {e}") from e
+
+
 class DatabaseManager:
     """
     Insert-only DB Wrapper, passend zu bestehenden Tabellen.
+    Alle Tabellen teilen sich eine Verbindung (open_db); der Writer-Thread puffert Records
+    per buffer() und schreibt sie mit flush_all() - die Puffer mehrerer Tabellen mit einem
+    einzigen Commit.
     Wirft DatabaseError statt still zu printen.
     """
-    def __init__(self, db_file: str, table: str, fields_in_order: list[str]):
-        self.db_file = db_file
+    # max. gepufferte Records pro Tabelle, solange die DB nicht schreibbar ist (Lock/IO)
+    PENDING_MAX = WRITE_QUEUE_MAX
+
+    # kein __dict__ pro Instanz, schnellerer Attributzugriff im Writer-Thread
+    __slots__ = ("_conn", "table", "fields", "_sql", "_pending")
+
+    def __init__(self, conn: sqlite3.Connection, table: str, fields_in_order: Sequence[str]):
+        self._conn: Optional[sqlite3.Connection] = conn
         self.table = table
-        self.fields = fields_in_order[:]  # Reihenfolge fuer INSERT
+        # feste Spaltenreihenfolge fuer INSERT; buffer() erwartet die Werte genau so
+        self.fields: Tuple[str, ...] = tuple(fields_in_order)
 
         cols_sql = ", ".join(self.fields)
         placeholders = ", ".join("?" for _ in self.fields)
         self._sql = f"INSERT INTO {self.table} ({cols_sql}) VALUES ({placeholders})"
 
-    def _connect(self):
-        return sqlite3.connect(self.db_file, timeout=5)
-
-    def insert(self, record: dict):
-        values = [record.get(c) for c in self.fields]
-        last_err: Exception | None = None
+        # Puffer (nur der Writer-Thread schreibt -> kein Lock noetig)
+        self._pending: list[Sequence[Any]] = []
+
+    def buffer(self, rows: Sequence[Sequence[Any]]):
+        """Records (je positional wie self.fields) puffern; geschrieben wird mit flush()/flush_all()."""
+        self._pending.extend(rows)
+
+    def flush(self):
+        """Schreibt alle gepufferten Records dieser Tabelle in einer Transaktion."""
+        DatabaseManager.flush_all((self,))
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, items: Sequence[Tuple[str, Sequence[Sequence[Any]]]]):
+        """
+        (sql, rows)-Paare in einer Transaktion schreiben; bei Fehler ROLLBACK und weiterwerfen.
+        BEGIN IMMEDIATE holt den Write-Lock vorab: Locks wartet busy_timeout ab,
+        ein veralteter WAL-Snapshot (SQLITE_BUSY_SNAPSHOT) kann so nicht auftreten.
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, rows in items:
+                conn.executemany(sql, rows)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def flush_all(managers: Sequence["DatabaseManager"]):
+        """
+        Schreibt die Puffer aller managers (gleiche Verbindung) in einer Transaktion:
+        ein BEGIN IMMEDIATE / COMMIT (ein fsync) fuer alle Tabellen zusammen.
+        Puffer werden erst nach erfolgreichem COMMIT geleert:
+        - voruebergehende Fehler (is_retryable, z.B. Lock laenger als busy_timeout): Records
+          bleiben gepuffert und werden beim naechsten flush erneut geschrieben
+          (max. PENDING_MAX pro Tabelle)
+        - alle anderen Fehler (z.B. IntegrityError, "no such table"): erneut pro Tabelle
+          schreiben, so dass gesunde Tabellen committen und nur die fehlerhaften Records
+          verworfen und gemeldet werden
+        """
+        batches = [m for m in managers if m._pending]
+        if not batches:
+            return
 
-        for _ in range(5):
-            try:
-                conn = self._connect()
-                try:
-                    cur = conn.cursor()
-                    cur.execute(self._sql, values)
-                    conn.commit()
-                    return
-                finally:
-                    conn.close()
+        tables = ", ".join(m.table for m in batches)
+        n_rows = sum(len(m._pending) for m in batches)
 
-            except sqlite3.OperationalError as e:
-                last_err = e
-                if "locked" in str(e).lower():
-                    time.sleep(0.2)
-                    continue
-                raise DatabaseError(f"DB insert failed ({self.table}): {e}") from e
+        conn = batches[0]._conn
+        if conn is None:
+            for m in batches:
+                m._pending = []
+            raise DatabaseError(f"DB connection closed ({tables}), {n_rows} rows dropped")
 
+        try:
+            try:
+                DatabaseManager._write(conn, [(m._sql, m._pending) for m in batches])
+                for m in batches:
+                    m._pending = []
+                return
             except sqlite3.Error as e:
-                raise DatabaseError(f"DB error ({self.table}): {e}") from e
+                if is_retryable(e):
+                    raise
+                n_rejected, rejected = DatabaseManager._write_separately(conn, batches)
+
+        except sqlite3.Error as e:
+            # nur is_retryable(e), auch "database is locked" nach Ablauf von busy_timeout (30 s)
+            dropped = DatabaseManager._trim_pending(batches)
+            kept = sum(len(m._pending) for m in batches)
+            note = f", {dropped} oldest dropped (buffer full)" if dropped else ""
+            raise DatabaseError(
+                f"DB insert failed ({tables}, {kept} rows kept for retry{note}): {e}"
+            ) from e
+
+        if rejected:
+            details = "; ".join(rejected[:5])
+            raise DatabaseError(
+                f"DB rejected {n_rejected} of {n_rows} rows ({tables}), dropped: {details}"
+            )
 
-        raise DatabaseError(
-            f"DB insert failed after retries ({self.table}): database remained locked. Last error: {last_err}"
-        )
+    @staticmethod
+    def _write_separately(conn: sqlite3.Connection, managers: Sequence["DatabaseManager"]) -> Tuple[int, list[str]]:
+        """
+        Fallback nach einem nicht voruebergehenden Fehler im gemeinsamen Batch: jede Tabelle
+        einzeln schreiben. Schema-Fehler (OperationalError, z.B. "no such column") verwerfen
+        die Records der Tabelle, andere Fehler (z.B. IntegrityError) werden pro Record
+        wiederholt. Rueckgabe: (Anzahl, Beschreibung) der verworfenen Records.
+        Voruebergehende Fehler (is_retryable) werden weitergeworfen, noch nicht geschriebene
+        Records bleiben gepuffert.
+        """
+        n_rejected = 0
+        rejected: list[str] = []
+        for m in managers:
+            rows = m._pending
+            try:
+                DatabaseManager._write(conn, ((m._sql, rows),))
+            except sqlite3.OperationalError as e:
+                if is_retryable(e):
+                    raise
+                n_rejected += len(rows)
+                rejected.append(f"{m.table}: {e} ({len(rows)} rows)")
+            except sqlite3.Error:
+                for i, row in enumerate(rows):
+                    try:
+                        DatabaseManager._write(conn, ((m._sql, (row,)),))
+                    except sqlite3.Error as e:
+                        if is_retryable(e):
+                            m._pending = rows[i:]
+                            raise
+                        n_rejected += 1
+                        rejected.append(f"{m.table}: {e} {tuple(row)!r}")
+            m._pending = []
+        return n_rejected, rejected
+
+    @staticmethod
+    def _trim_pending(managers: Sequence["DatabaseManager"]) -> int:
+        """Gepufferte Records pro Tabelle auf PENDING_MAX begrenzen (aelteste zuerst verwerfen)."""
+        dropped = 0
+        for m in managers:
+            excess = len(m._pending) - DatabaseManager.PENDING_MAX
+            if excess > 0:
+                del m._pending[:excess]
+                dropped += excess
+        return dropped
+
+    def close(self):
+        """
+        Restpuffer schreiben und von der Verbindung loesen (idempotent).
+        Nur aus dem Writer-Thread aufrufen; die gemeinsame Verbindung schliesst danach
+        ebenfalls der Writer-Thread (MQTTLogger._writer_loop).
+        """
+        if self._conn is None:
+            return
+        try:
+            self.flush()
+        except DatabaseError as e:
+            log.error("❌ %s", e)
+        finally:
+            self._conn = None
 
 
 # Note: Email and Ntfy notifiers are now handled by MessageSender class in msg_sender.py
@@ -184,23 +445,65 @@ class MQTTLogger:
         self.msg_sender = msg_sender
         self.cfg = cfg
 
+        # haeufig gebrauchte Config-Werte einmal binden (Hot Path / Meldungstexte)
+        self._mqtt_host = cfg.mqtt.host
+        self._mqtt_port = cfg.mqtt.port
+        self._mqtt_topic = cfg.mqtt.topic
+        self._db_file = cfg.db_file
+        self._compact_log = bool(getattr(cfg.mqtt, "compact_log_enabled", True))
+        self._max_payload_bytes = int(getattr(cfg.mqtt, "max_payload_bytes", 8192))
+
+        # Trigger-Configs einmal binden (statt self.msg_sender.config.<trigger>.<attr> pro Aufruf)
+        mcfg = msg_sender.config
+        self._trig_info = mcfg.info
+        self._trig_unknown_sensor_error = mcfg.unknown_sensor_error
+        self._trig_json_decode_error = mcfg.json_decode_error
+        self._trig_non_dict_payload = mcfg.non_dict_payload
+        self._trig_missing_timestamp = mcfg.missing_timestamp
+        self._trig_missing_data = mcfg.missing_data
+        self._trig_bad_values = mcfg.bad_values
+        self._trig_db_size = mcfg.db_size
+        self._preview_chars = mcfg.logfile.payload_preview_chars
+
+        # feste Platzhalter fuer die *_TMPL Alarm-Texte
+        self._body_ctx: Dict[str, Any] = {
+            "host": self._mqtt_host,
+            "port": self._mqtt_port,
+            "topic": self._mqtt_topic,
+            "db": self._db_file,
+        }
+
         # active tables after schema check
         self.active_tables: Dict[str, TableConfig] = {}
         self.inactive_tables: Dict[str, str] = {}  # table_key -> reason
 
-        # per sensor-id last message time
+        # per sensor-id last message time (alle Zeitstempel im time.monotonic() Bereich)
         self.last_message_time: Dict[str, float] = {}
 
         # for bad-values: track count and first occurrence time per sensor
-        self.bad_value_events: Dict[str, int] = {}
+        self.bad_value_events: DefaultDict[str, int] = defaultdict(int)
         self.bad_value_first_ts: Dict[str, float] = {}  # timestamp when bad-value window started
 
         # per sensor exception counts (for MIN_COUNT_BEFORE_MAIL)
-        self.exception_counts: Dict[str, int] = {}
+        self.exception_counts: DefaultDict[str, int] = defaultdict(int)
 
-        # DB managers per table_key
+        # DB managers per table_key, alle auf einer gemeinsamen Verbindung (in start() geoeffnet)
+        self._conn: Optional[sqlite3.Connection] = None
         self.dbs: Dict[str, DatabaseManager] = {}
 
+        # Snapshot der aktiven Tabellen fuer die periodischen Checks (in start() gesetzt)
+        self._active_list: Tuple[TableConfig, ...] = ()
+
+        # Writer-Thread: on_message legt (table_key, values) in die Queue,
+        # Fehler kommen ueber _write_errors zurueck in den Haupt-Thread
+        self._write_q: "queue.SimpleQueue[Optional[Tuple[str, list[Any]]]]" = queue.SimpleQueue()
+        self._write_errors: "queue.SimpleQueue[Tuple[str, DatabaseError]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+
+        # sensor_id -> Route (table_key, table_name, timestamp_name, getter, fields, sanitizers),
+        # nur aktive Tabellen (in start() gebaut; on_message braucht so keine TableConfig-Attribute)
+        self._routes: Dict[str, Route] = {}
+
         # per sensor stats
         self.rx_stats: Dict[str, Dict[str, float]] = {}
         # Struktur pro sensor_id:
@@ -211,60 +514,71 @@ class MQTTLogger:
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
 
+        # rx summary (log_rx_summary)
+        self._rx_summary_ts: float = time.monotonic()
+        self._rx_summary_count: int = 0
+
         # schedule bookkeeping
-        self._last_db_size_check_ts: float = 0.0
         self._last_info_mail_ts: float = 0.0
 
     # ---------- routing ----------
 
     def _sensor_id_from_topic(self, topic: str) -> Optional[str]:
-        parts = topic.split("/")
-        if len(parts) >= 3 and parts[0] == "mobilealerts":
-            return parts[1]
-        return None
-
-    def _get_table_for_sensor(self, sensor_id: str) -> Optional[TableConfig]:
-        # config mapping via sensor_id in TABLE blocks
-        t = self.cfg.get_table_by_sensor_id(sensor_id)
-        if not t:
+        # "mobilealerts/<sensor_id>/..." ohne split() (keine Liste pro Nachricht)
+        if not topic.startswith(TOPIC_PREFIX):
             return None
-        # is it active?
-        for tcfg in self.active_tables.values():
-            if tcfg.sensor_id == sensor_id:
-                return tcfg
-        return None
+        i = topic.find("/", TOPIC_PREFIX_LEN)
+        return topic[TOPIC_PREFIX_LEN:i] if i > TOPIC_PREFIX_LEN else None
+
+    @staticmethod
+    def _build_route(tkey: str, tcfg: TableConfig) -> Route:
+        """Einmal pro Tabelle: Feldreihenfolge, itemgetter und sanitize-Funktionen vorberechnen."""
+        fields = tuple(skey for skey, _ in tcfg.sensor_items)
+        if not fields:
+            getter = lambda d: ()
+        elif len(fields) == 1:
+            # itemgetter mit einem Key liefert den Wert selbst, nicht ein Tupel
+            key = fields[0]
+            getter = lambda d: (d[key],)
+        else:
+            getter = operator.itemgetter(*fields)
+        sanitizers = tuple(sensor.sanitize_value for _, sensor in tcfg.sensor_items)
+        return (tkey, tcfg.name, tcfg.timestamp.name, getter, fields, sanitizers)
 
     # ---------- exception handler ----------
 
-    def _handle_exception(self, sensor_id: str, topic: str, payload_str: str, exc: Exception):
+    def _handle_exception(self, sensor_id: str, topic: str, payload: bytes, exc: Exception):
         """Handle exceptions and send notifications via MessageSender."""
 
-        self.exception_counts[sensor_id] = self.exception_counts.get(sensor_id, 0) + 1
-
-        payload_preview = payload_str[:self.msg_sender.config.logfile.payload_preview_chars]
-
-        body = (
-            f"Exception im MQTT Logger\n"
-            f"Exception: {type(exc).__name__}\n"
-            f"Sensor-ID: {sensor_id}\n"
-            f"Topic: {topic}\n"
-            f"Zeit: {datetime.datetime.now().isoformat()}\n"
-            f"Fehler: {repr(exc)}\n"
-            f"Count: {self.exception_counts[sensor_id]}\n"
-            f"DB: {self.cfg.db_file}\n"
-            f"Broker: {self.cfg.mqtt.host}:{self.cfg.mqtt.port}\n"
-            f"Topic-Filter: {self.cfg.mqtt.topic}\n"
-        )
+        self.exception_counts[sensor_id] += 1
+
+        exc_name = type(exc).__name__
+        trigger_key = f"EXCEPTION_{exc_name}"
+        # gedrosselt -> weder Payload dekodieren noch Text bauen (Exception-Sturm)
+        if self.msg_sender.is_throttled(trigger_key):
+            return
+
+        # rohe Payload-Bytes erst hier (und nur den Preview-Teil) dekodieren
+        payload_preview = self._payload_preview(payload) if payload else ""
+
+        body = EXCEPTION_TMPL.format_map({
+            **self._body_ctx,
+            "exc_name": exc_name,
+            "sid": sensor_id,
+            "msg_topic": topic,
+            "now_iso": datetime.datetime.now().isoformat(),
+            "exc": repr(exc),
+            "count": self.exception_counts[sensor_id],
+        })
         if payload_preview:
             body += f"\nPayload-Preview:\n{payload_preview}\n"
 
-        trigger_key = f"EXCEPTION_{type(exc).__name__}"
-        trigger_title = f"[ERROR] {type(exc).__name__} ({sensor_id})"
+        trigger_title = f"[ERROR] {exc_name} ({sensor_id})"
         
         sent = self.msg_sender.send(
             trigger_key=trigger_key,
             trigger_title=trigger_title,
-            enabled_channels=self.msg_sender.config.info.enabled,  # Use default config channels
+            enabled_channels=self._trig_info.enabled,  # Use default config channels
             payload=body,
             payload_full=body,
         )
@@ -272,54 +586,77 @@ class MQTTLogger:
         if sent:
             self.exception_counts[sensor_id] = 0
 
+    def _payload_preview(self, payload: bytes) -> str:
+        """Payload nur im Fehlerfall (und nur den Preview-Teil) dekodieren."""
+        n = self._preview_chars
+        head = payload[:n]
+        if head.isascii():
+            # typischer Sensor-JSON: reines ASCII -> 1 Byte pro Zeichen, kein replace-Decoder
+            return head.decode("ascii")
+        # max. 4 Bytes pro UTF-8 Zeichen
+        return payload[:n * 4].decode("utf-8", errors="replace")[:n]
+
     def _handle_fatal_exception(self, sensor_id: str, topic: str, exc: Exception, exit_code: int = 1):
         """Handle fatal exception, send notification with delay, and exit gracefully."""
-        self._handle_exception(sensor_id, topic, "", exc)
+        self._handle_exception(sensor_id, topic, b"", exc)
         # Give async operations (mail, ntfy) time to complete
         time.sleep(0.5)
         sys.exit(exit_code)
 
+    def _reconnect(self):
+        """Verbindung zum Broker wiederherstellen (loop() laeuft ohne Thread -> selbst reconnecten)."""
+        try:
+            self.client.reconnect()
+        except OSError as e:
+            log.warning("⚠️ MQTT reconnect fehlgeschlagen: %s", e)
+            time.sleep(5)
+
     # ---------- mqtt callbacks ----------
 
     def on_connect(self, client, userdata, connect_flags, reason_code, properties):
-        client.subscribe(self.cfg.mqtt.topic)
+        # QoS 0: Messwerte sind ueber utms idempotent, kein PUBACK-Roundtrip pro Nachricht
+        client.subscribe(self._mqtt_topic, qos=0)
 
     def on_message(self, client, userdata, message):
         sensor_id = self._sensor_id_from_topic(message.topic)
-        payload_str = ""
-        payload_str = message.payload.decode("utf-8", errors="replace")
 
         try:
+            # Groessen-Check vor jedem Decode/Parse (fehlkonfigurierte Publisher)
+            if len(message.payload) > self._max_payload_bytes:
+                raise PayloadFormatError(
+                    f"Payload zu gross ({len(message.payload)} > {self._max_payload_bytes} bytes)"
+                )
+
             if not sensor_id:
                 msg_txt = f"Sensor unbekannt ({sensor_id})"
                 self.msg_sender.send(
                     trigger_key=f"UNKNOWN_SENSOR_ERROR",
-                    trigger_title=self.msg_sender.config.unknown_sensor_error.title,
-                    enabled_channels=self.msg_sender.config.unknown_sensor_error.enabled,
+                    trigger_title=self._trig_unknown_sensor_error.title,
+                    enabled_channels=self._trig_unknown_sensor_error.enabled,
                     payload=f"Topic: {message.topic}\n{msg_txt}",
                 )
                 return
         
-            table = self._get_table_for_sensor(sensor_id)
-            if not table:
+            route = self._routes.get(sensor_id)
+            if route is None:
                 msg_txt = f"Sensor unbekannt ({sensor_id})"
                 self.msg_sender.send(
                     trigger_key=f"UNKNOWN_SENSOR_ERROR",
-                    trigger_title=self.msg_sender.config.unknown_sensor_error.title,
-                    enabled_channels=self.msg_sender.config.unknown_sensor_error.enabled,
+                    trigger_title=self._trig_unknown_sensor_error.title,
+                    enabled_channels=self._trig_unknown_sensor_error.enabled,
                     payload=f"Topic: {message.topic}\n{msg_txt}",
                 )
                 return
 
             # JSON parse
             try:
-                payload = json.loads(payload_str)
-            except json.JSONDecodeError as e:
+                payload = _loads(message.payload)
+            except json.JSONDecodeError as e:  # orjson.JSONDecodeError ist Subklasse
                 msg_txt = f"Ungueltiges JSON-Format ({e})"
                 self.msg_sender.send(
                     trigger_key=f"JSON_DECODE_ERROR",
-                    trigger_title=self.msg_sender.config.json_decode_error.title,
-                    enabled_channels=self.msg_sender.config.json_decode_error.enabled,
+                    trigger_title=self._trig_json_decode_error.title,
+                    enabled_channels=self._trig_json_decode_error.enabled,
                     payload=f"Topic: {message.topic}\n{msg_txt}",
                 )
                 return
@@ -329,52 +666,60 @@ class MQTTLogger:
                 msg_txt = f"Payload ist kein JSON-Objekt (type={type(payload).__name__})"
                 self.msg_sender.send(
                     trigger_key=f"NON_DICT_PAYLOAD",
-                    trigger_title=self.msg_sender.config.non_dict_payload.title,
-                    enabled_channels=self.msg_sender.config.non_dict_payload.enabled,
+                    trigger_title=self._trig_non_dict_payload.title,
+                    enabled_channels=self._trig_non_dict_payload.enabled,
                     payload=f"Topic: {message.topic}\n{msg_txt}",
                 )
                 return
 
+            tkey, tname, ts_key, getter, fields, sanitizers = route
+
             # timestamp required
-            ts_key = table.timestamp.name
             utms = payload.get(ts_key)
             if not utms:
                 msg_txt = f"Pflichtfeld '{ts_key}' fehlt oder ist leer"
                 self.msg_sender.send(
                     trigger_key=f"MISSING_TIMESTAMP",
-                    trigger_title=self.msg_sender.config.missing_timestamp.title,
-                    enabled_channels=self.msg_sender.config.missing_timestamp.enabled,
+                    trigger_title=self._trig_missing_timestamp.title,
+                    enabled_channels=self._trig_missing_timestamp.enabled,
                     payload=f"Topic: {message.topic}\n{msg_txt}",
                 )
                 return
 
-            record: Dict[str, Any] = {ts_key: utms}
+            # Werte positional in DB-Spaltenreihenfolge (timestamp + sensors), kein dict
+            values: list[Any] = [utms]
 
-            # bad value detection: count fields where invalid_map matched and mapped to None
+            # bad value detection: is_good kommt aus derselben sanitize-Runde (kein zweiter Lookup)
             bad_hit = 0
 
-            for skey, sensor in table.sensors.items():
-                raw = payload.get(skey)
-                #print(f"Debug: sensor field '{skey}' raw value: {raw!r} raw typ {type(raw).__name__}")
-                value, is_good = sensor.sanitize_value(raw)
-                record[skey] = value
-                if not is_good:
-                    bad_hit += 1
-
-                
-
-            # Insert
-            self.dbs[table.key].insert(record)
+            # alle Sensorfelder mit einem itemgetter-Aufruf; fehlt ein Feld -> .get() (None)
+            try:
+                raws = getter(payload)
+            except KeyError:
+                raws = tuple(map(payload.get, fields))
+
+            for sanitize, raw in zip(sanitizers, raws):
+                value, is_good = sanitize(raw)
+                values.append(value)
+                bad_hit += not is_good
+
+            # Insert -> Writer-Thread
+            if self._write_q.qsize() >= WRITE_QUEUE_MAX:
+                raise DatabaseError(
+                    f"Write queue full ({WRITE_QUEUE_MAX} records pending), record for {tname} dropped"
+                )
+            self._write_q.put_nowait((tkey, values))
 
-            # compact log
-            compact = bool(getattr(self.cfg.mqtt, "compact_log_enabled", True))
-            if compact:
-                print(f"✅ {sensor_id} -> {table.name} | ts={utms}")
-            else:
-                print(f"✅ {sensor_id} -> {table.name} | record={record}")
+            # compact log (pro Nachricht nur auf DEBUG, Zusammenfassung siehe log_rx_summary)
+            if log.isEnabledFor(logging.DEBUG):
+                if self._compact_log:
+                    log.debug("✅ %s -> %s | ts=%s", sensor_id, tname, utms)
+                else:
+                    log.debug("✅ %s -> %s | record=%s", sensor_id, tname,
+                              dict(zip(self.dbs[tkey].fields, values)))
 
             # state update
-            now = time.time()
+            now = time.monotonic()
             self.last_message_time[sensor_id] = now
             
             st = self.rx_stats.get(sensor_id)
@@ -391,29 +736,128 @@ class MQTTLogger:
                 st["last_ts"] = now
 
             if bad_hit > 0:
-                if sensor_id not in self.bad_value_events:
+                if not self.bad_value_events[sensor_id]:  # neues Fenster (auch nach gesendetem Alarm)
                     self.bad_value_first_ts[sensor_id] = now
-                self.bad_value_events[sensor_id] = self.bad_value_events.get(sensor_id, 0) + bad_hit
+                self.bad_value_events[sensor_id] += bad_hit
 
         except MQTTLoggerError as e:
-            self._handle_exception(sensor_id, message.topic, payload_str, e)
+            self._handle_exception(sensor_id, message.topic, message.payload, e)
 
         except Exception as e:
             # unexpected -> treat as internal bug
-            self._handle_exception(sensor_id, message.topic, payload_str, InternalLoggerError(repr(e)))
+            self._handle_exception(sensor_id, message.topic, message.payload, InternalLoggerError(repr(e)))
+
+    # --------------------------
+    # DB Writer-Thread
+    # --------------------------
+
+    def _writer_loop(self):
+        """
+        Einziger Thread, der in die DB schreibt: sammelt bis WRITER_BATCH_MAX Records
+        oder WRITER_MAX_WAIT_S und schreibt dann alle Tabellen in einer Transaktion.
+        None in der Queue beendet den Thread (Restpuffer wird geschrieben).
+        Zwischen zwei Durchgaengen (keine offene Transaktion) laufen WAL-Checkpoint und optimize.
+        """
+        q = self._write_q
+        running = True
+        next_checkpoint = time.monotonic() + WAL_CHECKPOINT_INTERVAL_S
+        next_optimize = time.monotonic() + DB_OPTIMIZE_INTERVAL_S
+        while running:
+            now = time.monotonic()
+            if now >= next_checkpoint:
+                next_checkpoint = now + WAL_CHECKPOINT_INTERVAL_S
+                self._writer_call("wal_checkpoint", run_pragma, self._conn, "PRAGMA wal_checkpoint(TRUNCATE)")
+            if now >= next_optimize:
+                next_optimize = now + DB_OPTIMIZE_INTERVAL_S
+                self._writer_call("optimize", run_pragma, self._conn, "PRAGMA optimize")
+
+            try:
+                item = q.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            batches: DefaultDict[str, list[Sequence[Any]]] = defaultdict(list)
+            deadline = time.monotonic() + WRITER_MAX_WAIT_S
+            n = 0
+            while True:
+                if item is None:
+                    running = False
+                    break
+                tkey, values = item
+                batches[tkey].append(values)
+                n += 1
+                if n >= WRITER_BATCH_MAX:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = q.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+            for tkey, rows in batches.items():
+                self.dbs[tkey].buffer(rows)
+            if batches:
+                self._writer_call(",".join(batches), DatabaseManager.flush_all, tuple(self.dbs.values()))
+
+        self._writer_call("all", DatabaseManager.flush_all, tuple(self.dbs.values()))
+        for db in self.dbs.values():
+            db.close()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _writer_call(self, tkey: str, fn: Callable[..., None], *args: Any):
+        try:
+            fn(*args)
+        except DatabaseError as e:
+            self._write_errors.put((tkey, e))
+
+    def report_writer_errors(self):
+        """Fehler aus dem Writer-Thread im Haupt-Thread melden (MessageSender nur hier)."""
+        while True:
+            try:
+                tkey, e = self._write_errors.get_nowait()
+            except queue.Empty:
+                return
+            self._handle_exception("global", f"db_write/{tkey}", b"", e)
+
+    def _stop_writer(self):
+        if self._writer is None:
+            return
+        self._write_q.put(None)
+        # Writer besitzt die Verbindung: erst nach seinem Ende ist sie geschlossen
+        self._writer.join(timeout=WRITER_JOIN_TIMEOUT_S)
+        if self._writer.is_alive():
+            log.error("DB writer did not stop within %d s, pending records may be lost",
+                      WRITER_JOIN_TIMEOUT_S)
+        self._writer = None
+        self.report_writer_errors()
 
     # --------------------------
     # Periodic checks
     # --------------------------
 
+    def log_rx_summary(self):
+        """Eine Zeile Empfangsrate statt einer Zeile pro Nachricht."""
+        now = time.monotonic()
+        total = sum(int(st["count_total"]) for st in self.rx_stats.values())
+        dt = now - self._rx_summary_ts
+        n = total - self._rx_summary_count
+        if dt > 0:
+            log.info("📥 rx=%.2f/s over %d sensors (%d msgs in %.0f s)", n / dt, len(self.rx_stats), n, dt)
+        self._rx_summary_ts = now
+        self._rx_summary_count = total
+
     def check_missing_data(self):
         """Check for missing MQTT data using MessageSender."""
-        window_s = int((self.msg_sender.config.missing_data.window_minutes or 0) * 60)
+        window_s = int((self._trig_missing_data.window_minutes or 0) * 60)
         if window_s <= 0:
             return
 
-        now = time.time()
-        for t in self.active_tables.values():
+        now = time.monotonic()
+        for t in self._active_list:
             sid = t.sensor_id
             last = self.last_message_time.get(sid)
             if last is None:
@@ -421,35 +865,32 @@ class MQTTLogger:
 
             diff = now - last
             if diff > window_s:
+                if self.msg_sender.is_throttled(f"MISSING_DATA_{sid}"):
+                    continue
                 hours = round(diff / 3600, 2)
-                last_ts = datetime.datetime.fromtimestamp(last).isoformat()
-
-                body = (
-                    f"Seit {hours} Stunden keine neuen Daten!\n"
-                    f"Sensor-ID: {sid}\n"
-                    f"Tabelle: {t.name}\n"
-                    f"Letzter Empfang: {last_ts}\n"
-                    f"Broker: {self.cfg.mqtt.host}:{self.cfg.mqtt.port}\n"
-                    f"Topic: {self.cfg.mqtt.topic}\n"
-                    f"DB: {self.cfg.db_file}\n"
+                # monotonic -> Wanduhrzeit erst hier (nur wenn ein Alarm ansteht)
+                last_ts = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(time.time() - diff))
+
+                body = MISSING_DATA_TMPL.format_map(
+                    {**self._body_ctx, "hours": hours, "sid": sid, "table": t.name, "last_ts": last_ts}
                 )
 
                 self.msg_sender.send(
                     trigger_key=f"MISSING_DATA_{sid}",
-                    trigger_title=self.msg_sender.config.missing_data.title,
-                    enabled_channels=self.msg_sender.config.missing_data.enabled,
+                    trigger_title=self._trig_missing_data.title,
+                    enabled_channels=self._trig_missing_data.enabled,
                     payload=body,
                 )
 
     def check_bad_values(self):
         """Check for bad values using MessageSender, respecting WINDOW_MINUTES."""
-        window_s = int((self.msg_sender.config.bad_values.window_minutes or 0) * 60)
+        window_s = int((self._trig_bad_values.window_minutes or 0) * 60)
         if window_s <= 0:
             window_s = 30 * 60  # default to 30 minutes
 
-        now = time.time()
+        now = time.monotonic()
 
-        for t in self.active_tables.values():
+        for t in self._active_list:
             sid = t.sensor_id
             count = self.bad_value_events.get(sid, 0)
             if count <= 0:
@@ -462,20 +903,17 @@ class MQTTLogger:
             if window_elapsed < window_s:
                 continue
 
-            body = (
-                f"BAD VALUES erkannt (invalid_map -> NULL)!\n\n"
-                f"Sensor-ID: {sid}\n"
-                f"Tabelle: {t.name}\n"
-                f"Anzahl bad-field hits in {int(window_s/60)} min Fenster: {count}\n"
-                f"Broker: {self.cfg.mqtt.host}:{self.cfg.mqtt.port}\n"
-                f"Topic: {self.cfg.mqtt.topic}\n"
-                f"DB: {self.cfg.db_file}\n"
+            if self.msg_sender.is_throttled(f"BAD_VALUES_{sid}"):
+                continue
+
+            body = BAD_VALUES_TMPL.format_map(
+                {**self._body_ctx, "sid": sid, "table": t.name, "window_min": int(window_s / 60), "count": count}
             )
 
             sent = self.msg_sender.send(
                 trigger_key=f"BAD_VALUES_{sid}",
-                trigger_title=self.msg_sender.config.bad_values.title,
-                enabled_channels=self.msg_sender.config.bad_values.enabled,
+                trigger_title=self._trig_bad_values.title,
+                enabled_channels=self._trig_bad_values.enabled,
                 payload=body,
                 payload_full=body,
             )
@@ -484,59 +922,54 @@ class MQTTLogger:
                 self.bad_value_first_ts[sid] = 0.0
 
     def check_db_size(self):
-        """Check database size using MessageSender."""
-        check_hours = self.msg_sender.config.db_size.check_every_hours
-        if check_hours is None or check_hours <= 0:
-            return
-
-        now = time.time()
-        if self._last_db_size_check_ts and (now - self._last_db_size_check_ts) < (int(check_hours) * 3600):
-            return
-        self._last_db_size_check_ts = now
-
-        size_b = get_db_size_bytes(self.cfg.db_file)
+        """Check database size using MessageSender (Intervall CHECK_EVERY_HOURS via Scheduler)."""
+        size_b = get_db_size_bytes(self._db_file)
         size_mb = size_b / (1024 * 1024)
 
-        warn = self.msg_sender.config.db_size.warn_mb or 0
-        crit = self.msg_sender.config.db_size.crit_mb or 0
+        warn = self._trig_db_size.warn_mb or 0
+        crit = self._trig_db_size.crit_mb or 0
 
         if crit and size_mb >= crit:
-            body = (
-                f"DB Groesse Kritisch: {size_mb:.1f} MB\n"
-                f"BD Kritische Schwelle: {crit} MB)\n"
-                f"DB: {self.cfg.db_file}\n"
-            )
+            if self.msg_sender.is_throttled("DB_SIZE_CRITICAL"):
+                return
+            body = DB_SIZE_CRITICAL_TMPL.format_map({**self._body_ctx, "size_mb": size_mb, "limit": crit})
             self.msg_sender.send(
                 trigger_key="DB_SIZE_CRITICAL",
-                trigger_title=self.msg_sender.config.db_size.title,
-                enabled_channels=self.msg_sender.config.db_size.enabled,
+                trigger_title=self._trig_db_size.title,
+                enabled_channels=self._trig_db_size.enabled,
                 payload=body,
             )
         elif warn and size_mb >= warn:
-            body = (
-                f"DB Groesse Warnung: {size_mb:.1f} MB\n"
-                f"BD Warn Schwelle: {warn} MB)\n"
-                f"DB: {self.cfg.db_file}\n"
-            )
+            if self.msg_sender.is_throttled("DB_SIZE_WARNING"):
+                return
+            body = DB_SIZE_WARNING_TMPL.format_map({**self._body_ctx, "size_mb": size_mb, "limit": warn})
             self.msg_sender.send(
                 trigger_key="DB_SIZE_WARNING",
-                trigger_title=self.msg_sender.config.db_size.title,
-                enabled_channels=self.msg_sender.config.db_size.enabled,
+                trigger_title=self._trig_db_size.title,
+                enabled_channels=self._trig_db_size.enabled,
                 payload=body,
             )
 
     def maybe_send_info_mail(self):
         """Send periodic info message using MessageSender."""
         repeat_s = self.msg_sender.config.max_repeat_hours * 3600  # Use max_repeat_hours from config
-        if self._last_info_mail_ts and (time.time() - self._last_info_mail_ts) < repeat_s:
+        if self._last_info_mail_ts and (time.monotonic() - self._last_info_mail_ts) < repeat_s:
+            return
+        # Statistik nur rechnen, wenn die Meldung auch rausgeht
+        if self.msg_sender.is_throttled("INFO_PERIODIC"):
+            return
+        # seit der letzten Info-Mail nichts Neues empfangen -> keine Statistik rechnen
+        # (Ausfaelle meldet check_missing_data; ohne jeden Empfang wird weiter gesendet)
+        stats = self.rx_stats.values()
+        if stats and all(st["count_total"] == st["last_info_count"] for st in stats):
             return
 
         start_time_iso = datetime.datetime.now().isoformat()
 
         lines = []
-        now = time.time()
+        now = time.monotonic()
 
-        for t in self.active_tables.values():
+        for t in self._active_list:
             sid = t.sensor_id
             st = self.rx_stats.get(sid)
 
@@ -586,34 +1019,40 @@ class MQTTLogger:
 
         stats_text = "\n".join(lines)
 
-        body = (
-            f"Logger laeuft.\n"
-            f"Zeit: {start_time_iso}\n"
-            f"Broker: {self.cfg.mqtt.host}:{self.cfg.mqtt.port}\n"
-            f"Topic: {self.cfg.mqtt.topic}\n"
-            f"DB: {self.cfg.db_file}\n"
-            f"Empfangs-Statistik:\n"
-            f"{stats_text}\n"
-        )
+        body = INFO_TMPL.format_map({**self._body_ctx, "now_iso": start_time_iso, "stats": stats_text})
 
         sent = self.msg_sender.send(
             trigger_key="INFO_PERIODIC",
-            trigger_title=self.msg_sender.config.info.title,
-            enabled_channels=self.msg_sender.config.info.enabled,
+            trigger_title=self._trig_info.title,
+            enabled_channels=self._trig_info.enabled,
             payload=body,
         )
 
         if sent:
-            self._last_info_mail_ts = time.time()
+            self._last_info_mail_ts = time.monotonic()
 
             # Referenz fuer Intervall setzen
-            for t in self.active_tables.values():
+            for t in self._active_list:
                 sid = t.sensor_id
                 st = self.rx_stats.get(sid)
                 if st:
                     st["last_info_count"] = int(st["count_total"])
                     st["last_info_ts"] = self._last_info_mail_ts
 
+    def _periodic_jobs(self) -> list[Tuple[float, Callable[[], None]]]:
+        """(Intervall in s, Funktion) fuer den Scheduler in start(); jede Pruefung mit eigenem Takt."""
+        jobs: list[Tuple[float, Callable[[], None]]] = [
+            (CHECK_INTERVAL_S, self.log_rx_summary),
+            (CHECK_INTERVAL_S, self.check_missing_data),
+            (CHECK_INTERVAL_S, self.check_bad_values),
+            # Info-Mail prueft MAX_REPEAT_HOURS selbst (Drosselung haengt am tatsaechlichen Versand)
+            (CHECK_INTERVAL_S, self.maybe_send_info_mail),
+        ]
+        check_hours = self._trig_db_size.check_every_hours
+        if check_hours is not None and check_hours > 0:
+            jobs.append((check_hours * 3600, self.check_db_size))
+        return jobs
+
     # --------------------------
     # Start
     # --------------------------
@@ -621,7 +1060,7 @@ class MQTTLogger:
     def start(self):
         # Schema check -> aktive Tabellen bestimmen
         try:
-            problems = check_schema(self.cfg.db_file, self.cfg.tables)
+            problems = check_schema(self._db_file, self.cfg.tables)
         except Exception as e:
             # schema read failed -> treat as fatal, mail via exception handler with a synthetic sensor_id
             self._handle_fatal_exception("global", "schema_check", DatabaseError(str(e)))
@@ -639,73 +1078,102 @@ class MQTTLogger:
             )
             self._handle_fatal_exception("SCHEMA_CHECK", f"schema/{tkey}", DatabaseError(error_msg))
 
+        self._active_list = tuple(self.active_tables.values())
+
         if not self.active_tables:
-            error_msg = f"No active tables after schema check. DB: {self.cfg.db_file}"
+            error_msg = f"No active tables after schema check. DB: {self._db_file}"
             self._handle_fatal_exception("SCHEMA_CHECK", "schema/no_active_tables", DatabaseError(error_msg))
 
+        # eine Verbindung fuer alle Tabellen -> ein Commit pro Writer-Durchgang
+        try:
+            self._conn = open_db(self._db_file)
+        except DatabaseError as e:
+            self._handle_fatal_exception("global", "db_connect", e)
+
         # DB managers pro aktiver Tabelle erstellen
         for tkey, tcfg in self.active_tables.items():
-            fields = [tcfg.timestamp.name] + list(tcfg.sensors.keys())
+            # gleiche Reihenfolge wie die Werte-Liste in on_message: timestamp + sensor_items
+            fields = (tcfg.timestamp.name,) + tuple(skey for skey, _ in tcfg.sensor_items)
             self.dbs[tkey] = DatabaseManager(
-                db_file=self.cfg.db_file,
+                conn=self._conn,
                 table=tcfg.name,
                 fields_in_order=fields,
             )
+            self._routes[tcfg.sensor_id] = self._build_route(tkey, tcfg)
+
+        self._writer = threading.Thread(target=self._writer_loop, name="db_writer", daemon=True)
+        self._writer.start()
 
         # MQTT verbinden
         try:
-            self.client.connect(self.cfg.mqtt.host, self.cfg.mqtt.port, 60)
+            self.client.connect(self._mqtt_host, self._mqtt_port, 60)
         except Exception as e:
             self._handle_fatal_exception("global", "mqtt_connect", InternalLoggerError(repr(e)))
 
-        # MQTT loop
-        self.client.loop_start()
-
         # Startup info
         active_sensors = ", ".join(sorted([t.sensor_id for t in self.active_tables.values()]))
         running_body = (
             f"Logger laeuft und wartet auf Signale\n"
-            f"Broker: {self.cfg.mqtt.host}:{self.cfg.mqtt.port}\n"
-            f"Topic: {self.cfg.mqtt.topic}\n"
+            f"Broker: {self._mqtt_host}:{self._mqtt_port}\n"
+            f"Topic: {self._mqtt_topic}\n"
             f"Active Sensor IDs: {active_sensors}\n"
-            f"DB: {self.cfg.db_file}\n"
+            f"DB: {self._db_file}\n"
             f"Start: {datetime.datetime.now().isoformat()}\n"
             f"Druecke Ctrl+C zum Beenden.\n"
         )
         self.msg_sender.send(
             trigger_key="LOGGER_RUNNING",
-            trigger_title=self.msg_sender.config.info.title,
-            enabled_channels=self.msg_sender.config.info.enabled,
+            trigger_title=self._trig_info.title,
+            enabled_channels=self._trig_info.enabled,
             payload=running_body,
         )
 
+        # MQTT loop im Haupt-Thread (kein loop_start()-Thread); Checks ueber einen Min-Heap
+        # (faellig_ab, nr, intervall, funktion) -> jede Pruefung laeuft in ihrem eigenen Takt
+        first = time.monotonic() + FIRST_CHECK_DELAY_S
+        schedule = [(first, i, interval, fn) for i, (interval, fn) in enumerate(self._periodic_jobs())]
+        heapq.heapify(schedule)
         try:
             while True:
-                time.sleep(60)
-                self.check_missing_data()
-                self.check_bad_values()
-                self.check_db_size()
-                self.maybe_send_info_mail()
+                # nicht laenger blockieren als bis zum naechsten faelligen Check
+                timeout = min(1.0, max(0.0, schedule[0][0] - time.monotonic()))
+                rc = self.client.loop(timeout=timeout)
+                if rc != mqtt.MQTT_ERR_SUCCESS:
+                    self._reconnect()
+
+                self.report_writer_errors()
+
+                now = time.monotonic()
+                while schedule[0][0] <= now:
+                    due, i, interval, fn = heapq.heappop(schedule)
+                    fn()
+                    # verpasste Durchlaeufe (z.B. nach Suspend) nicht nachholen
+                    nxt = due + interval
+                    if nxt <= now:
+                        nxt = now + interval
+                    heapq.heappush(schedule, (nxt, i, interval, fn))
 
         except KeyboardInterrupt:
             shutdown_body = (
                 f"Logger Shutdown\n"
                 f"Reason: KeyboardInterrupt\n"
                 f"Time: {datetime.datetime.now().isoformat()}\n"
-                f"DB: {self.cfg.db_file}\n"
+                f"DB: {self._db_file}\n"
             )
             self.msg_sender.send(
                 trigger_key="LOGGER_SHUTDOWN",
-                trigger_title=self.msg_sender.config.info.title,
-                enabled_channels=self.msg_sender.config.info.enabled,
+                trigger_title=self._trig_info.title,
+                enabled_channels=self._trig_info.enabled,
                 payload=shutdown_body,
             )
         finally:
-            self.client.loop_stop()
             self.client.disconnect()
+            self._stop_writer()
 
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
     # Initialize MessageSender first
     try:
         msg_sender = MessageSender(CONFIG_MESSAGE_PATH)
@@ -727,7 +1195,18 @@ def main():
             payload_full=body,
         )
         sys.exit(1)
-    
+
+    # Log-Level aus der Config (LOG_LEVEL), unbekannte Werte -> INFO
+    level = logging.getLevelName(cfg.mqtt.log_level)
+    if not isinstance(level, int):
+        log.warning("⚠️ Unbekanntes LOG_LEVEL '%s', verwende INFO", cfg.mqtt.log_level)
+        level = logging.INFO
+    logging.getLogger().setLevel(level)
+
+    # systemctl stop/restart sendet SIGTERM: als SystemExit ausloesen, damit start() im
+    # finally die gepufferten Records schreibt und atexit (Mail/ntfy-Queue, Logfile) laeuft
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
     # Create logger with already-loaded dependencies
     logger = MQTTLogger(msg_sender=msg_sender, cfg=cfg)
     logger.start()
@@ -8,19 +8,28 @@ MessageSender class for sending alerts via multiple channels:
 """
 
 import json
+import queue
+import atexit
 import logging
-import smtplib
-import urllib.request
-import urllib.error
+import logging.handlers
+import subprocess
+import sys
+import threading
+import time
+import http.client
 import ssl
-from datetime import datetime, timedelta
+from urllib.parse import urlsplit
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Any, Tuple
 from dataclasses import asdict
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+
+# smtplib/email erst beim ersten Mail-Versand laden (Start ohne Mail-Kanal bleibt schlank)
+if TYPE_CHECKING:
+    import smtplib
+    from email.message import EmailMessage
 
 from config.models import MessageConfig, EnabledChannels
+from exceptions import MailError
 
 
 # --------------------------
@@ -29,6 +38,15 @@ from config.models import MessageConfig, EnabledChannels
 
 CONFIG_MESSAGE_PATH = "config/msg_config.json"
 
+TIME_FMT = "%Y-%m-%d %H:%M:%S"  # Zeitstempel in Texten (time.strftime, ohne datetime-Objekt)
+
+LAST_SENT_MAX_KEYS = 10000  # obere Grenze fuer last_sent (dynamische trigger_keys)
+
+SEND_DRAIN_TIMEOUT_S = 30  # beim Beenden max. so lange auf ausstehende Mails/Pushes warten
+
+LOGFILE_BUFFER_RECORDS = 256   # Logfile-Eintraege gesammelt schreiben ...
+LOGFILE_FLUSH_INTERVAL_S = 1.0  # ... spaetestens nach dieser Zeit (ERROR sofort)
+
 
 # --------------------------
 # MessageSender Class
@@ -48,7 +66,33 @@ class MessageSender:
             config_path: Path to msg_config.json
         """
         self.config = MessageConfig.load(config_path)
-        self.last_sent: Dict[str, datetime] = {}  # Track last sent time per trigger type
+        self.last_sent: Dict[str, float] = {}  # Last send per trigger type (time.monotonic())
+        self._last_sent_wall: Dict[str, float] = {}  # dto. als time.time(), nur fuer get_last_sent_info()
+        self._repeat_s = self.config.max_repeat_hours * 3600.0
+        self._smtp: Optional["smtplib.SMTP"] = None  # Reused SMTP connection (lazy, mail thread only)
+        self._ntfy_conn: Optional[http.client.HTTPConnection] = None  # Reused HTTP(S) connection (ntfy thread only)
+
+        # Config ist fuer die Lebensdauer des Senders fest -> Invarianten einmal vorberechnen
+        self._subject_prefix = self.config.subject_prefix
+        self._stdout_tty = sys.stdout.isatty()
+        self._ntfy_target = urlsplit(f"{self.config.ntfy.server}/{self.config.ntfy.topic}")
+        self._ntfy_path = self._ntfy_target.path or "/"
+        self._ntfy_preview_chars = self.config.ntfy.payload_preview_chars
+        self._mail_preview_chars = self.config.mail.payload_preview_chars
+
+        # Statische ntfy-Header einmal bauen, pro Nachricht kommt nur "Title" dazu
+        self._ntfy_headers: Dict[str, str] = {
+            "Priority": str(self.config.ntfy.priority),
+            "Connection": "keep-alive",  # explizit, falls ein Proxy dazwischen HTTP/1.0-Defaults annimmt
+        }
+        if self.config.ntfy.token:
+            self._ntfy_headers["Authorization"] = f"Bearer {self.config.ntfy.token}"
+
+        # ntfy und Mail gehen je ueber einen eigenen Thread raus (Netzwerk-I/O blockiert
+        # sonst den Aufrufer, und beide Kanaele laufen parallel statt nacheinander)
+        self._send_qs: Dict[str, "queue.SimpleQueue[Optional[Tuple[Callable[..., None], tuple]]]"] = {}
+        self._send_threads: Dict[str, threading.Thread] = {}
+        self._atexit_registered = False
         
         # Setup logging if logfile enabled
         if self.config.logfile.enabled:
@@ -63,18 +107,40 @@ class MessageSender:
         
         self.logger = logging.getLogger("msg_sender")
         self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False  # nur ins Logfile, nicht zusaetzlich auf die Konsole
         
         # Remove existing handlers to avoid duplicates
         self.logger.handlers = []
         
-        handler = logging.FileHandler(log_path)
+        file_handler = logging.FileHandler(log_path)
         formatter = logging.Formatter(
             "%(asctime)s - %(levelname)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
+            datefmt=TIME_FMT
+        )
+        file_handler.setFormatter(formatter)
+
+        # Gepuffert: ein write() pro Schub statt pro Eintrag; den Rest schreibt
+        # logging.shutdown() beim Beenden (flushOnClose)
+        handler = logging.handlers.MemoryHandler(
+            capacity=LOGFILE_BUFFER_RECORDS,
+            flushLevel=logging.ERROR,
+            target=file_handler,
+            flushOnClose=True,
         )
-        handler.setFormatter(formatter)
         self.logger.addHandler(handler)
 
+        flusher = threading.Thread(
+            target=self._flush_logfile_periodically, args=(handler,), name="logfile_flush", daemon=True
+        )
+        flusher.start()
+
+    @staticmethod
+    def _flush_logfile_periodically(handler: logging.handlers.MemoryHandler) -> None:
+        """Buffered log entries reach the file at least every LOGFILE_FLUSH_INTERVAL_S."""
+        while True:
+            time.sleep(LOGFILE_FLUSH_INTERVAL_S)
+            handler.flush()
+
     def _should_send(self, trigger_key: str) -> bool:
         """
         Check if message should be sent based on max_repeat_hours.
@@ -85,12 +151,22 @@ class MessageSender:
         Returns:
             True if enough time has passed since last send or never sent
         """
-        if trigger_key not in self.last_sent:
-            return True
-        
-        time_since_last = datetime.now() - self.last_sent[trigger_key]
-        max_repeat = timedelta(hours=self.config.max_repeat_hours)
-        return time_since_last >= max_repeat
+        last = self.last_sent.get(trigger_key)
+        return last is None or time.monotonic() - last >= self._repeat_s
+
+    def is_throttled(self, trigger_key: str) -> bool:
+        """
+        Check whether a message for trigger_key would currently be skipped.
+
+        Lets callers skip building an expensive payload that send() would drop anyway.
+
+        Args:
+            trigger_key: Unique identifier for this trigger type
+
+        Returns:
+            True if the trigger was sent less than max_repeat_hours ago
+        """
+        return not self._should_send(trigger_key)
 
     def send(
         self,
@@ -134,16 +210,34 @@ class MessageSender:
             self._send_mail(trigger_title, payload_full)
 
         # Update last sent time
-        self.last_sent[trigger_key] = datetime.now()
+        # neu einfuegen -> Dict-Reihenfolge = Reihenfolge des letzten Versands
+        self.last_sent.pop(trigger_key, None)
+        self._last_sent_wall.pop(trigger_key, None)
+        self.last_sent[trigger_key] = time.monotonic()
+        self._last_sent_wall[trigger_key] = time.time()
+        if len(self.last_sent) > LAST_SENT_MAX_KEYS:
+            self._prune_last_sent()
         return True
 
+    def _prune_last_sent(self) -> None:
+        """Drop expired triggers; if still too many, drop the least recently sent."""
+        now = time.monotonic()
+        for key in [k for k, ts in self.last_sent.items() if now - ts >= self._repeat_s]:
+            del self.last_sent[key]
+            self._last_sent_wall.pop(key, None)
+        while len(self.last_sent) > LAST_SENT_MAX_KEYS:
+            key = next(iter(self.last_sent))
+            del self.last_sent[key]
+            self._last_sent_wall.pop(key, None)
+
     def _send_stdout(self, title: str, payload: str) -> None:
         """Send message to stdout (console)."""
         try:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"\n[{timestamp}] {self.config.subject_prefix}")
-            print(f"Title: {title}")
-            print(f"Payload:\n{payload}\n")
+            timestamp = time.strftime(TIME_FMT)
+            # ein write() statt vier print()-Aufrufe
+            sys.stdout.write(f"\n[{timestamp}] {self._subject_prefix}\nTitle: {title}\nPayload:\n{payload}\n\n")
+            if self._stdout_tty:
+                sys.stdout.flush()
         except Exception as e:
             print(f"Error sending stdout: {e}")
 
@@ -164,74 +258,234 @@ class MessageSender:
             return
 
         try:
-            url = f"{self.config.ntfy.server}/{self.config.ntfy.topic}"
-            
-            headers = {
-                "Title": f"{self.config.subject_prefix} {title}",
-                "Priority": str(self.config.ntfy.priority),
-            }
-            
-            if self.config.ntfy.token:
-                headers["Authorization"] = f"Bearer {self.config.ntfy.token}"
+            headers = {**self._ntfy_headers, "Title": f"{self._subject_prefix} {title}"}
 
             # Truncate payload for preview
-            preview = payload[:self.config.ntfy.payload_preview_chars]
-            
+            preview = payload[:self._ntfy_preview_chars]
+
+            self._submit("ntfy", self._deliver_ntfy, preview.encode("utf-8"), headers)
+
+        except Exception as e:
+            self._log_error(f"Error sending ntfy notification: {e}")
+
+    def _deliver_ntfy(self, body: bytes, headers: Dict[str, str]) -> None:
+        """Send one prepared push notification (ntfy thread)."""
+        try:
+            self._ntfy_post(body, headers)
+        except Exception as e:
+            self._log_error(f"Error sending ntfy notification: {e}")
+
+    def _ntfy_post(self, body: bytes, headers: Dict[str, str]) -> None:
+        """
+        POST to ntfy over the kept-alive connection.
+
+        A request on a reused connection that the server has closed in the
+        meantime is retried once on a fresh connection.
+
+        Args:
+            body: Request body
+            headers: Request headers
+        """
+        for attempt in (1, 2):
+            reused = self._ntfy_conn is not None
+            conn = self._get_ntfy_conn()
+            try:
+                conn.request("POST", self._ntfy_path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()  # Antwort ganz lesen, sonst ist die Verbindung nicht wiederverwendbar
+            except (http.client.HTTPException, OSError):
+                self._close_ntfy()
+                if reused and attempt == 1:
+                    continue
+                raise
+            if response.status >= 400:
+                raise http.client.HTTPException(f"HTTP {response.status} {response.reason}")
+            return
+
+    def _get_ntfy_conn(self) -> http.client.HTTPConnection:
+        """Return the cached ntfy connection, creating it on first use."""
+        if self._ntfy_conn is not None:
+            return self._ntfy_conn
+
+        parts = self._ntfy_target
+        if parts.scheme == "https":
             # Bypass SSL verification (ntfy.sh sometimes has SSL issues)
             ssl_context = ssl.create_default_context()
             ssl_context.check_hostname = False
             ssl_context.verify_mode = ssl.CERT_NONE
-            
-            req = urllib.request.Request(
-                url,
-                data=preview.encode("utf-8"),
-                headers=headers,
-                method="POST"
+            self._ntfy_conn = http.client.HTTPSConnection(
+                parts.hostname, parts.port, timeout=10, context=ssl_context
             )
-            
-            with urllib.request.urlopen(req, context=ssl_context, timeout=10) as response:
-                response.read()
-            
-        except Exception as e:
-            self._log_error(f"Error sending ntfy notification: {e}")
+        else:
+            self._ntfy_conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=10)
+        return self._ntfy_conn
+
+    def _close_ntfy(self) -> None:
+        """Close cached ntfy connection (ignores errors)."""
+        if self._ntfy_conn is None:
+            return
+        try:
+            self._ntfy_conn.close()
+        except OSError:
+            pass
+        self._ntfy_conn = None
 
     def _send_mail(self, title: str, payload: str) -> None:
-        """Send email message."""
+        """Send email message via SMTP (or local `mail` command if configured)."""
         if not self.config.mail.enabled:
             return
 
         try:
-            msg = MIMEMultipart()
+            from email.message import EmailMessage
+
+            msg = EmailMessage()
             msg["From"] = self.config.mail.sender
             msg["To"] = self.config.mail.recipient
-            msg["Subject"] = f"{self.config.subject_prefix} {title}"
+            msg["Subject"] = f"{self._subject_prefix} {title}"
 
             # Truncate payload for preview
-            preview = payload[:self.config.mail.payload_preview_chars]
+            preview = payload[:self._mail_preview_chars]
             
             body = f"""
-Subject: {self.config.subject_prefix} {title}
+Subject: {self._subject_prefix} {title}
 
 {preview}
 
 ---
-Sent at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Sent at: {time.strftime(TIME_FMT)}
             """
             
-            msg.attach(MIMEText(body, "plain"))
+            msg.set_content(body)
+
+            self._submit("mail", self._deliver_mail, msg, body)
+
+        except Exception as e:
+            self._log_error(f"Error sending mail: {e}")
+
+    def _submit(self, channel: str, fn: Callable[..., None], *args: Any) -> None:
+        """
+        Queue a delivery for the channel's worker thread (started on first use).
+
+        Args:
+            channel: "mail" or "ntfy"
+            fn: Delivery function, called on the worker thread
+            *args: Arguments for fn
+        """
+        q = self._send_qs.get(channel)
+        if q is None:
+            q = self._send_qs[channel] = queue.SimpleQueue()
+            on_exit = self._close_smtp if channel == "mail" else self._close_ntfy
+            thread = threading.Thread(
+                target=self._send_worker, args=(q, on_exit), name=f"{channel}_sender", daemon=True
+            )
+            self._send_threads[channel] = thread
+            thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.close)
+                self._atexit_registered = True
+        q.put((fn, args))
+
+    @staticmethod
+    def _send_worker(
+        q: "queue.SimpleQueue[Optional[Tuple[Callable[..., None], tuple]]]",
+        on_exit: Callable[[], None],
+    ) -> None:
+        """Run queued deliveries one by one until a None sentinel arrives."""
+        while True:
+            item = q.get()
+            if item is None:
+                break
+            fn, args = item
+            fn(*args)
+        on_exit()
+
+    def _deliver_mail(self, msg: "EmailMessage", body: str) -> None:
+        """Send one prepared mail via SMTP or the local `mail` command (mail thread)."""
+        try:
+            if self.config.mail.use_local_mail:
+                self._send_local_mail(msg["Subject"], body)
+            else:
+                self._get_smtp().send_message(msg)
 
-            # SMTP sending would go here
-            # For now, just prepare the message
             self._log_mail_message(msg)
-            
+
         except Exception as e:
-            self._log_error(f"Error preparing mail: {e}")
+            # Connection might be broken -> next mail reconnects
+            self._close_smtp()
+            self._log_error(f"Error sending mail: {e}")
+
+    def close(self, timeout: float = SEND_DRAIN_TIMEOUT_S) -> None:
+        """
+        Send all queued mails/pushes and stop the worker threads (idempotent).
+
+        Args:
+            timeout: Max. seconds to wait for pending deliveries (all channels together)
+        """
+        for q in self._send_qs.values():
+            q.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self._send_threads.values():
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._send_qs.clear()
+        self._send_threads.clear()
+
+    def _get_smtp(self) -> "smtplib.SMTP":
+        """
+        Return the cached SMTP connection, (re)connecting if necessary.
+
+        The connection is kept open between mails; a NOOP checks whether
+        the server has dropped it in the meantime.
+        """
+        import smtplib
+
+        if self._smtp is not None:
+            try:
+                code, _ = self._smtp.noop()
+                if code == 250:
+                    return self._smtp
+            except OSError:  # smtplib.SMTPException ist Subklasse
+                pass
+            self._close_smtp()
+
+        self._smtp = smtplib.SMTP(
+            self.config.mail.smtp_host,
+            self.config.mail.smtp_port,
+            timeout=10,
+        )
+        return self._smtp
+
+    def _close_smtp(self) -> None:
+        """Close cached SMTP connection (ignores errors)."""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except OSError:  # smtplib.SMTPException ist Subklasse
+            pass
+        self._smtp = None
+
+    def _send_local_mail(self, subject: str, body: str) -> None:
+        """Fallback: send via local `mail` command (e.g. msmtp on the Raspberry Pi)."""
+        body_bytes = body.encode("utf-8")
+        try:
+            # stdout wird nie gebraucht -> DEVNULL, stderr nur fuer die Fehlermeldung
+            subprocess.run(
+                ["mail", "-s", subject, self.config.mail.recipient],
+                input=body_bytes,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                check=True,
+                timeout=30,
+            )
+        except subprocess.CalledProcessError as e:
+            stderr = (e.stderr or b"").decode("utf-8", "replace").strip()
+            raise MailError(f"mail exited with {e.returncode}: {stderr}") from e
 
-    def _log_mail_message(self, msg: MIMEMultipart) -> None:
-        """Log mail message (stub for actual SMTP sending)."""
+    def _log_mail_message(self, msg: "EmailMessage") -> None:
+        """Log sent mail message."""
         try:
             if self.logger:
-                self.logger.info(f"Mail prepared: {msg['Subject']} -> {msg['To']}")
+                self.logger.info(f"Mail sent: {msg['Subject']} -> {msg['To']}")
         except Exception as e:
             self._log_error(f"Error logging mail message: {e}")
 
@@ -253,8 +507,8 @@ Sent at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             Dict mapping trigger_key to formatted datetime string
         """
         return {
-            key: dt.strftime("%Y-%m-%d %H:%M:%S")
-            for key, dt in self.last_sent.items()
+            key: time.strftime(TIME_FMT, time.localtime(ts))
+            for key, ts in self._last_sent_wall.items()
         }
 
 
@@ -5,10 +5,18 @@
 
 import time
 import json
-import random
 from datetime import datetime, timedelta
+import numpy as np
 import paho.mqtt.client as mqtt
 
+# orjson serialisiert direkt nach bytes (schneller), Fallback auf json
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
 BROKER = "127.0.0.1"
 TOPIC_PREFIX = "mobilealerts"
 TOPIC_PREFIX_ERROR = "mobilefault"
@@ -17,6 +25,67 @@ SENSOR_TH = "11566802925f"
 SENSOR_W  = "0b55aada036f"
 SENSOR_ERROR  = "0b55aada9999"  # Unbekannter Sensor fuer UnknownSensorError
 
+WIND_DIRECTIONS = ["N", "NE", "E", "SE", "S", "SW", "W", "NW", "WSW"]
+
+PUBLISH_QOS = 0
+WAIT_FOR_PUBLISH = False      # True: pro Batch auf Auslieferung an den Broker warten
+WAIT_FOR_PUBLISH_TIMEOUT_S = 1.0
+
+
+# --------------------------
+# Zufallswerte (blockweise mit numpy gezogen statt einzeln mit random)
+# --------------------------
+
+RAND_BUF_SIZE = 4096
+
+_rng = np.random.default_rng()
+
+
+class RandomPool:
+    """RAND_BUF_SIZE vorab gezogene Werte; neuer Block, wenn aufgebraucht."""
+
+    def __init__(self, draw):
+        self._draw = draw  # draw(n) -> numpy array mit n Werten
+        self._refill()
+
+    def _refill(self):
+        self._values = self._draw(RAND_BUF_SIZE).tolist()  # einmal nach Python-Zahlen/str
+        self._pos = 0
+
+    def next(self):
+        if self._pos >= len(self._values):
+            self._refill()
+        value = self._values[self._pos]
+        self._pos += 1
+        return value
+
+
+def uniform_pool(center: float, spread: float) -> RandomPool:
+    """center +- spread, auf 1 Nachkommastelle gerundet."""
+    return RandomPool(lambda n: np.round(center + _rng.uniform(-spread, spread, n), 1))
+
+
+def int_pool(low: int, high: int) -> RandomPool:
+    """Ganzzahlen low..high (inklusive, wie random.randint)."""
+    return RandomPool(lambda n: _rng.integers(low, high + 1, n))
+
+
+_LAST_TRANSMIT = int_pool(200, 600)
+
+_TH_TEMP1 = uniform_pool(3.6, 0.3)
+_TH_HUM1 = int_pool(90, 95)
+_TH_TEMP2 = uniform_pool(19.2, 0.3)
+_TH_HUM2 = int_pool(56, 62)
+_TH_TEMP3 = uniform_pool(15.3, 0.3)
+_TH_HUM3 = int_pool(56, 60)
+_TH_TEMP_IN = uniform_pool(20.8, 0.5)
+_TH_HUM_IN = int_pool(42, 50)
+
+_W_DEGREE = uniform_pool(180.0, 180.0)
+_W_DIRECTION = RandomPool(lambda n: _rng.choice(WIND_DIRECTIONS, n))
+_W_SPEED = uniform_pool(1.75, 1.75)
+_W_GUST = uniform_pool(2.5, 2.5)
+
 
 def iso_utc(dt: datetime) -> str:
     return dt.isoformat(timespec="seconds") + ".000Z"
@@ -28,21 +97,21 @@ def base_timestamps(counter: int):
         "t": ts.strftime("%d.%m.%Y, %H:%M:%S"),
         "ut": int(ts.timestamp()),
         "utms": iso_utc(ts),
-        "lastTransmit": random.randint(200, 600),
+        "lastTransmit": _LAST_TRANSMIT.next(),
     }
 
 
 def payload_th(counter: int) -> dict:
     base = base_timestamps(counter)
     return {
-        "temperature1": [round(3.6 + random.uniform(-0.3, 0.3), 1), 3.8],
-        "humidity1":    [random.randint(90, 95), 94],
-        "temperature2": [round(19.2 + random.uniform(-0.3, 0.3), 1), 19.2],
-        "humidity2":    [random.randint(56, 62), 59],
-        "temperature3": [round(15.3 + random.uniform(-0.3, 0.3), 1), 15.3],
-        "humidity3":    [random.randint(56, 60), 58],
-        "temperatureIN":[round(20.8 + random.uniform(-0.5, 0.5), 1), 20.8],
-        "humidityIN":   [random.randint(42, 50), 46],
+        "temperature1": [_TH_TEMP1.next(), 3.8],
+        "humidity1":    [_TH_HUM1.next(), 94],
+        "temperature2": [_TH_TEMP2.next(), 19.2],
+        "humidity2":    [_TH_HUM2.next(), 59],
+        "temperature3": [_TH_TEMP3.next(), 15.3],
+        "humidity3":    [_TH_HUM3.next(), 58],
+        "temperatureIN":[_TH_TEMP_IN.next(), 20.8],
+        "humidityIN":   [_TH_HUM_IN.next(), 46],
         "battery":      "ok" if counter % 7 != 0 else "low",
         "offline":      False,
         "id": SENSOR_TH,
@@ -53,10 +122,10 @@ def payload_th(counter: int) -> dict:
 def payload_wind(counter: int) -> dict:
     base = base_timestamps(counter)
     return {
-        "directionDegree": round(random.uniform(0, 360), 1),
-        "direction": random.choice(["N", "NE", "E", "SE", "S", "SW", "W", "NW", "WSW"]),
-        "windSpeed": round(random.uniform(0.0, 3.5), 1),
-        "gustSpeed": round(random.uniform(0.0, 5.0), 1),
+        "directionDegree": _W_DEGREE.next(),
+        "direction": _W_DIRECTION.next(),
+        "windSpeed": _W_SPEED.next(),
+        "gustSpeed": _W_GUST.next(),
         "battery": "ok" if counter % 6 != 0 else "low",
         "offline": False,
         "id": SENSOR_W,
@@ -77,8 +146,8 @@ def publish_invalid_json(client: mqtt.Client, topic: str):
 
 def publish_non_dict_json(client: mqtt.Client, topic: str):
     # JSON aber nicht dict -> PayloadFormatError (wenn raise aktiviert)
-    payload = json.dumps([1, 2, 3])
-    print(f"> [FAULT] non_dict_payload: {topic} {payload}")
+    payload = _dumps([1, 2, 3])
+    print(f"> [FAULT] non_dict_payload: {topic} {payload.decode()}")
     client.publish(topic, payload)
 
 
@@ -87,22 +156,22 @@ def publish_missing_timestamp(client: mqtt.Client, topic: str, base_payload: dic
     p = dict(base_payload)
     if ts_key in p:
         del p[ts_key]
-    payload = json.dumps(p)
-    print(f"> [FAULT] missing_timestamp: {topic} {payload}")
+    payload = _dumps(p)
+    print(f"> [FAULT] missing_timestamp: {topic} {payload.decode()}")
     client.publish(topic, payload)
 
 def publish_unknown_sensor_exception(client: mqtt.Client, base_payload: dict):
     # Unbekannter Sensor -> UnknownSensorError
     topic = f"{TOPIC_PREFIX}/{SENSOR_ERROR}/json"
-    payload = json.dumps(base_payload)
-    print(f"> [FAULT] unknown_sensor: {topic} {payload}")
+    payload = _dumps(base_payload)
+    print(f"> [FAULT] unknown_sensor: {topic} {payload.decode()}")
     client.publish(topic, payload)
 
 def publish_unknown_topic_prefix_exception(client: mqtt.Client, base_payload: dict):
     # Unbekannter Sensor -> UnknownSensorError
     topic = f"{TOPIC_PREFIX_ERROR}/{SENSOR_W}/json"
-    payload = json.dumps(base_payload)
-    print(f"> [FAULT] unknown_topic_prefix: {topic} {payload}")
+    payload = _dumps(base_payload)
+    print(f"> [FAULT] unknown_topic_prefix: {topic} {payload.decode()}")
     client.publish(topic, payload)
 
 
@@ -112,7 +181,7 @@ def publish_bad_values(client: mqtt.Client, base_payload: dict):
     p = dict(base_payload)
     p["temperature1"] = [-9999, 3.8]  # Bad value
     topic = f"{TOPIC_PREFIX}/{SENSOR_TH}/json"
-    payload = json.dumps(p)
+    payload = _dumps(p)
     print(f"> [FAULT] bad_values (temperature1=-9999): {topic}")
     client.publish(topic, payload)
 
@@ -121,20 +190,34 @@ def main():
     print(f"🔌 Verbinde zu MQTT Broker {BROKER} ...")
     client = mqtt.Client()
     client.connect(BROKER)
+    # Netzwerk-Loop im Hintergrund-Thread: publish() wird sofort gesendet statt erst beim naechsten Aufruf
+    client.loop_start()
     print("✅ Verbunden")
 
+    try:
+        run(client)
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+
+def run(client: mqtt.Client):
     counter = 0
+    th_topic = f"{TOPIC_PREFIX}/{SENSOR_TH}/json"
+    w_topic  = f"{TOPIC_PREFIX}/{SENSOR_W}/json"
 
     while True:
         # normale Messages
         th = payload_th(counter)
         w  = payload_wind(counter)
 
-        th_topic = f"{TOPIC_PREFIX}/{SENSOR_TH}/json"
-        w_topic  = f"{TOPIC_PREFIX}/{SENSOR_W}/json"
-
-        client.publish(th_topic, json.dumps(th))
-        client.publish(w_topic, json.dumps(w))
+        infos = [
+            client.publish(th_topic, _dumps(th), qos=PUBLISH_QOS),
+            client.publish(w_topic, _dumps(w), qos=PUBLISH_QOS),
+        ]
+        if WAIT_FOR_PUBLISH:
+            for info in infos:
+                info.wait_for_publish(timeout=WAIT_FOR_PUBLISH_TIMEOUT_S)
         print(f"> OK: {th_topic} (th), {w_topic} (wind)")
 
         # Fault injections
@@ -2,6 +2,14 @@
 import json
 from paho.mqtt import client as mqtt
 
+# orjson parst bytes direkt (schneller), Fallback auf json
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    def _loads(b):
+        return json.loads(b.decode("utf-8", errors="replace"))
+
 BROKER = "127.0.0.1"
 TOPIC  = "mobilealerts/#"
 
@@ -11,7 +19,7 @@ def on_connect(client, userdata, flags, rc):
 
 def on_message(client, userdata, msg):
     try:
-        payload = json.loads(msg.payload.decode("utf-8"))
+        payload = _loads(msg.payload)
     except Exception:
         payload = msg.payload.decode("utf-8")
     print(f"{msg.topic}: {payload}")
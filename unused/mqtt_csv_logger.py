@@ -2,13 +2,30 @@
 import json
 import sqlite3
 import datetime
+import threading
+from itertools import repeat
+import time
 from paho.mqtt import client as mqtt
 
+from mqtt_payload_utils import split_utms, safe_extract_value, normalize_battery
+
+# orjson parst bytes direkt (schneller), Fallback auf json
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    def _loads(b):
+        return json.loads(b.decode("utf-8", errors="replace"))
+
 # --- KONFIGURATION ---
 BROKER = "127.0.0.1"
 TOPIC  = "mobilealerts/#"
 DB_FILE = "mobilealerts.db"
 
+# Datensaetze gesammelt schreiben: ein Commit pro Batch statt pro Nachricht
+FLUSH_MAX_RECORDS = 200
+FLUSH_INTERVAL_S = 2.0
+
 # WICHTIG: Definiere hier deine Sensor-Mappings!
 SENSOR_MAP = {
     "11566802925f": "Garten_Sensor",
@@ -22,10 +39,11 @@ def initialize_database():
     """Erstellt die Datenbankverbindung und die Tabelle, falls sie nicht existiert."""
     try:
         conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
         
-        # SQL-Befehl zur Erstellung der Tabelle 'measurements'
-        cursor.execute("""
+        # Tabelle 'measurements' + Index in einer Transaktion (ein Commit)
+        # PRAGMAs gehoeren nicht hierher (gelten pro Verbindung, nicht pro Transaktion)
+        conn.executescript("""
+            BEGIN;
             CREATE TABLE IF NOT EXISTS measurements (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp_iso TEXT NOT NULL,
@@ -43,71 +61,84 @@ def initialize_database():
                 feuchte_in REAL,
                 battery_ok BOOLEAN,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+            );
+            CREATE INDEX IF NOT EXISTS idx_measurements_timestamp_iso
+                ON measurements (timestamp_iso);
+            COMMIT;
         """)
-        conn.commit()
         conn.close()
         print(f"✅ Datenbank {DB_FILE} initialisiert.")
         
     except sqlite3.Error as e:
         print(f"❌ Fehler bei der Datenbankinitialisierung: {e}")
 
-def insert_record(record):
-    """Fügt einen einzelnen Messdatensatz in die Datenbank ein."""
+# Spaltenreihenfolge fuer INSERT (einmal berechnet, Werte kommen als Tupel in dieser Reihenfolge)
+COLUMNS = (
+    "timestamp_iso", "datum_utc", "uhrzeit_utc", "sensor_name", "sensor_id_raw",
+    "temp1", "feuchte1", "temp2", "feuchte2", "temp3", "feuchte3",
+    "temp_in", "feuchte_in", "battery_ok"
+)
+INSERT_SQL = f"INSERT INTO measurements ({', '.join(COLUMNS)}) VALUES ({', '.join(['?'] * len(COLUMNS))})"
+COL_TEMP1 = COLUMNS.index("temp1")
+
+# Payload-Keys der numerischen Spalten temp1 .. feuchte_in (gleiche Reihenfolge)
+NUMERIC_KEYS = (
+    "temperature1", "humidity1", "temperature2", "humidity2",
+    "temperature3", "humidity3", "temperatureIN", "humidityIN",
+)
+N_NUMERIC = len(NUMERIC_KEYS)
+
+# Eine Verbindung fuer die ganze Laufzeit (autocommit, Transaktionen explizit pro Batch)
+# und ein Cursor darauf (conn.execute legt sonst pro Aufruf einen neuen an).
+# Zugriff nur unter _pending_lock (MQTT-Thread + Flush im Hauptthread).
+_conn = None
+_cursor = None
+_pending = []
+_pending_since = 0.0
+_pending_lock = threading.Lock()
+
+def open_database():
+    """Öffnet die gemeinsame Schreib-Verbindung (WAL, synchronous=NORMAL)."""
+    global _conn, _cursor
+    _conn = sqlite3.connect(DB_FILE, isolation_level=None, check_same_thread=False)
+    _conn.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA temp_store=MEMORY;")
+    _cursor = _conn.cursor()
+
+def insert_records(records):
+    """
+    Fügt mehrere Messdatensätze (Tupel in COLUMNS-Reihenfolge) in einer Transaktion ein.
+    Aufruf nur unter _pending_lock (gemeinsamer Cursor).
+    """
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        # SQLite kann Spaltennamen direkt aus einem Dictionary (record) verwenden
-        # Wir definieren die Spalten explizit, um die Reihenfolge zu garantieren
-        columns = [
-            "timestamp_iso", "datum_utc", "uhrzeit_utc", "sensor_name", "sensor_id_raw",
-            "temp1", "feuchte1", "temp2", "feuchte2", "temp3", "feuchte3", 
-            "temp_in", "feuchte_in", "battery_ok"
-        ]
-        
-        # Erstellt die Platzhalter: (?, ?, ?, ...)
-        placeholders = ', '.join(['?'] * len(columns))
-        
-        # Erstellt die Werte-Liste basierend auf der Spaltenreihenfolge
-        values = [record.get(col) for col in columns]
+        _cursor.execute("BEGIN")
+        _cursor.executemany(INSERT_SQL, records)
+        _cursor.execute("COMMIT")
 
-        sql = f"INSERT INTO measurements ({', '.join(columns)}) VALUES ({placeholders})"
-        cursor.execute(sql, values)
-        
-        conn.commit()
-        conn.close()
-        
     except sqlite3.Error as e:
-        print(f"❌ Fehler beim Einfügen des Datensatzes: {e}")
-
-# --- FUNKTION ZUR FEHLERBEHANDLUNG ---
-
-def safe_extract_value(data, key):
-    """
-    Extrahiert einen Messwert robust:
-    1. Holt den Wert zum Key.
-    2. Wenn es ein Array ist, nimmt es den ersten Wert [0].
-    3. Wenn es ein einzelner Wert ist, gibt es diesen zurück.
-    4. Gibt None zurück, wenn der Key fehlt oder der Wert ungültig ist.
-    """
-    value = data.get(key)
-    
-    if isinstance(value, list):
-        # Fall 1: Wert liegt als Array vor (wie in deinem Beispiel)
-        return value[0] if value else None
-    elif isinstance(value, (int, float)):
-        # Fall 2: Wert liegt als einfacher numerischer Typ vor
-        return value
-    elif isinstance(value, str) and value.replace('.', '', 1).isdigit():
-        # Fall 3: Wert liegt als parsbarer String vor
-        try:
-            return float(value)
-        except ValueError:
-            return None
-    
-    # Fall 4: Wert fehlt oder ist None
-    return None
+        if _conn.in_transaction:
+            _cursor.execute("ROLLBACK")
+        print(f"❌ Fehler beim Einfügen von {len(records)} Datensätzen: {e}")
+
+def flush_pending(force=False):
+    """Schreibt gesammelte Datensätze, wenn FLUSH_MAX_RECORDS oder FLUSH_INTERVAL_S erreicht ist."""
+    global _pending
+    with _pending_lock:
+        if not _pending:
+            return
+        if not force and len(_pending) < FLUSH_MAX_RECORDS \
+                and time.monotonic() - _pending_since < FLUSH_INTERVAL_S:
+            return
+        records, _pending = _pending, []
+        insert_records(records)
+
+def insert_record(values):
+    """Merkt einen einzelnen Messdatensatz (Tupel in COLUMNS-Reihenfolge) zum gesammelten Einfügen vor."""
+    global _pending_since
+    with _pending_lock:
+        if not _pending:
+            _pending_since = time.monotonic()
+        _pending.append(values)
+    flush_pending()
 
 # --- MQTT HANDLER ---
 
@@ -117,47 +148,32 @@ def on_connect(client, userdata, flags, rc):
 
 def on_message(client, userdata, msg):
     try:
-        payload = json.loads(msg.payload.decode("utf-8"))
+        payload = _loads(msg.payload)
         
         if isinstance(payload, dict):
             
             # --- 1. Zeitstempel-Verarbeitung ---
             utc_timestamp_iso = payload.get("utms", "")
-            datum = utc_timestamp_iso[:10] if utc_timestamp_iso else None
-            uhrzeit = utc_timestamp_iso[11:19] if utc_timestamp_iso else None
+            datum, uhrzeit = split_utms(utc_timestamp_iso)
 
             # --- 2. Batteriestatus-Verarbeitung ---
-            batterie_ok = payload.get("battery", "").lower() == "ok" 
+            batterie_ok = normalize_battery(payload.get("battery"))
             
             # --- 3. Sensor-Mapping ---
             sensor_id_raw = payload.get("id")
             sensor_name = SENSOR_MAP.get(sensor_id_raw, sensor_id_raw)
 
-            # --- 4. Daten-Record erstellen (mit robuster Extraktion) ---
-            record = {
-                "timestamp_iso": utc_timestamp_iso,
-                "datum_utc": datum,
-                "uhrzeit_utc": uhrzeit,
-                "sensor_name": sensor_name,
-                "sensor_id_raw": sensor_id_raw,
-                
-                # Robuste Extraktion der numerischen Werte
-                "temp1": safe_extract_value(payload, "temperature1"),
-                "feuchte1": safe_extract_value(payload, "humidity1"),
-                "temp2": safe_extract_value(payload, "temperature2"),
-                "feuchte2": safe_extract_value(payload, "humidity2"),
-                "temp3": safe_extract_value(payload, "temperature3"),
-                "feuchte3": safe_extract_value(payload, "humidity3"),
-                "temp_in": safe_extract_value(payload, "temperatureIN"),
-                "feuchte_in": safe_extract_value(payload, "humidityIN"),
-                
-                "battery_ok": batterie_ok
-            }
+            # --- 4. Werte-Tupel direkt in Spaltenreihenfolge (mit robuster Extraktion) ---
+            values = (
+                utc_timestamp_iso, datum, uhrzeit, sensor_name, sensor_id_raw,
+                *map(safe_extract_value, repeat(payload, N_NUMERIC), NUMERIC_KEYS),
+                batterie_ok,
+            )
             
             # 5. In SQLite-Datenbank einfügen
-            insert_record(record)
+            insert_record(values)
             
-            print(f"✅ DB: {sensor_name} | Temp1: {record['temp1']} | Eingefügt.")
+            print(f"✅ DB: {sensor_name} | Temp1: {values[COL_TEMP1]} | Vorgemerkt.")
         
         else:
             print(f"ℹ️ {msg.topic}: {msg.payload.decode('utf-8')} (Nicht-JSON-Nachricht ignoriert)")
@@ -171,6 +187,7 @@ def on_message(client, userdata, msg):
 # --- HAUPTPROGRAMM ---
 # 1. Datenbank initialisieren
 initialize_database()
+open_database()
 
 # 2. MQTT-Client starten
 client = mqtt.Client()
@@ -180,6 +197,17 @@ print(f"Verbinde zu Broker {BROKER}...")
 
 try:
     client.connect(BROKER, 1883, 60)
-    client.loop_forever()
+    # Netzwerk-Loop im Hintergrund; der Hauptthread schreibt liegengebliebene Datensaetze
+    # spaetestens nach FLUSH_INTERVAL_S, auch wenn keine weiteren Nachrichten kommen
+    client.loop_start()
+    while True:
+        time.sleep(FLUSH_INTERVAL_S / 2)
+        flush_pending()
+except KeyboardInterrupt:
+    pass
 except Exception as e:
-    print(f"❌ Verbindungsfehler: {e}")
\ No newline at end of file
+    print(f"❌ Verbindungsfehler: {e}")
+finally:
+    client.loop_stop()
+    flush_pending(force=True)
+    _conn.close()
\ No newline at end of file
@@ -0,0 +1,71 @@
+# mqtt_payload_utils.py
+# Gemeinsame Payload-Helfer fuer mqtt_csv_logger.py und mqtt_sqlite_logger.py
+import math
+import datetime
+
+# --- ZEITSTEMPEL ---
+
+# utms kommt als "YYYY-MM-DDTHH:MM:SS.sssZ" -> feste Slices, kein datetime noetig
+_DATE, _TIME = slice(0, 10), slice(11, 19)
+
+def split_utms(utc_timestamp_iso):
+    """
+    Zerlegt den ISO-Zeitstempel (oder Epoch-Millisekunden) in (datum, uhrzeit).
+    Strings werden wie bisher fest geschnitten ([:10] / [11:19]).
+    """
+    if not utc_timestamp_iso:
+        return None, None
+    if type(utc_timestamp_iso) is not str:
+        # Epoch in ms (int/float) -> slicen wuerde falsche Daten liefern
+        try:
+            dt = datetime.datetime.fromtimestamp(utc_timestamp_iso / 1000.0, datetime.timezone.utc)
+        except (TypeError, ValueError, OverflowError, OSError):
+            return None, None
+        return dt.strftime("%Y-%m-%d"), dt.strftime("%H:%M:%S")
+    return utc_timestamp_iso[_DATE], utc_timestamp_iso[_TIME]
+
+# --- FUNKTION ZUR FEHLERBEHANDLUNG ---
+
+def safe_extract_value(data, key):
+    """
+    Extrahiert einen Messwert robust:
+    1. Holt den Wert zum Key.
+    2. Wenn es ein Array ist, nimmt es den ersten Wert [0].
+    3. Wenn es ein einzelner Wert ist, gibt es diesen zurück.
+    4. Gibt None zurück, wenn der Key fehlt oder der Wert ungültig ist.
+    """
+    value = data.get(key)
+    t = type(value)
+
+    if t is float or t is int:
+        # Fall 2 (haeufigster Fall): Wert liegt als einfacher numerischer Typ vor
+        return value
+    elif t is list:
+        # Fall 1: Wert liegt als Array vor (wie in deinem Beispiel)
+        return value[0] if value else None
+    elif t is str:
+        # Fall 3: Wert liegt als parsbarer String vor (auch negativ / Exponent, ohne Kopie);
+        # "nan"/"inf" und "1_0" akzeptiert float() ebenfalls -> verwerfen
+        if "_" in value:
+            return None
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+        return number if math.isfinite(number) else None
+    elif isinstance(value, bool):
+        # bool ist Subklasse von int -> wie bisher als Zahl behandeln
+        return value
+
+    # Fall 4: Wert fehlt oder ist None
+    return None
+
+def normalize_battery(value):
+    """Batteriestatus -> True/False ("ok" bzw. True == ok)."""
+    if value == "ok":  # haeufigster Fall, ohne lower()-Kopie
+        return True
+    if type(value) is str:
+        return value.lower() == "ok"
+    if type(value) is bool:
+        return value
+    return False
@@ -1,24 +1,80 @@
 # mqtt_sqlite_logger.py
 import json
+import logging
+import time
 import sqlite3
 import datetime
+import threading
 from paho.mqtt import client as mqtt
 
+from mqtt_payload_utils import split_utms, safe_extract_value, normalize_battery
+
+# orjson parst bytes direkt (schneller), Fallback auf json
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    def _loads(b):
+        return json.loads(b.decode("utf-8", errors="replace"))
+
+log = logging.getLogger("mqtt_sqlite_logger")
+
 # --- KONFIGURATION ---
 BROKER = "127.0.0.1"
 TOPIC  = "mobilealerts/#"
 DB_FILE = "log/mobilealerts.db"
 
+# Inserts puffern: ein Commit pro Batch statt pro Nachricht
+BATCH_SIZE = 50           # spaetestens nach so vielen Records schreiben
+FLUSH_INTERVAL_S = 2.0    # ... oder wenn der letzte Flush so lange her ist
+
+# WAL + synchronous=NORMAL: weniger fsyncs (SD-Karte), Leser blockieren den Writer nicht;
+# busy_timeout: SQLite wartet selbst bei Locks
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
 # --- FUNKTIONEN ZUR DATENBANKVERWALTUNG ---
 
+def connect_db():
+    """Verbindung im autocommit-Modus (Transaktionen explizit) mit PRAGMAS."""
+    conn = sqlite3.connect(DB_FILE, timeout=5.0, isolation_level=None, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+# Eine Schreib-Verbindung fuer die ganze Laufzeit (statt connect/close pro Flush);
+# genutzt aus MQTT-Thread und Haupt-Thread -> Schreibzugriffe ueber _db_lock
+_conn = None
+_db_lock = threading.Lock()
+
+def get_db():
+    global _conn
+    if _conn is None:
+        _conn = connect_db()
+    return _conn
+
+def close_db():
+    """Verbindung beim Beenden schliessen."""
+    global _conn
+    with _db_lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
 def initialize_database():
     """Erstellt die Datenbankverbindung und die Tabelle, falls sie nicht existiert."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
+        conn = connect_db()  # journal_mode=WAL bleibt in der DB-Datei gespeichert
         
-        # SQL-Befehl zur Erstellung der Tabelle 'measurements'
-        cursor.execute("""
+        # Tabelle 'measurements' + Index in einer Transaktion (ein Commit)
+        # PRAGMAs gehoeren nicht hierher (gelten pro Verbindung, nicht pro Transaktion)
+        conn.executescript("""
+            BEGIN;
             CREATE TABLE IF NOT EXISTS measurements (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp_iso TEXT NOT NULL,
@@ -35,71 +91,75 @@ def initialize_database():
                 feuchte_in REAL,
                 battery_ok BOOLEAN,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+            );
+            CREATE INDEX IF NOT EXISTS idx_measurements_timestamp_iso
+                ON measurements (timestamp_iso);
+            COMMIT;
         """)
-        conn.commit()
         conn.close()
         print(f"✅ Datenbank {DB_FILE} initialisiert.")
         
     except sqlite3.Error as e:
         print(f"❌ Fehler bei der Datenbankinitialisierung: {e}")
 
-def insert_record(record):
-    """Fügt einen einzelnen Messdatensatz in die Datenbank ein."""
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        # SQLite kann Spaltennamen direkt aus einem Dictionary (record) verwenden
-        # Wir definieren die Spalten explizit, um die Reihenfolge zu garantieren
-        columns = [
-            "timestamp_iso", "datum_utc", "uhrzeit_utc", "gateway_id",
-            "temp1", "feuchte1", "temp2", "feuchte2", "temp3", "feuchte3", 
-            "temp_in", "feuchte_in", "battery_ok"
-        ]
-        
-        # Erstellt die Platzhalter: (?, ?, ?, ...)
-        placeholders = ', '.join(['?'] * len(columns))
-        
-        # Erstellt die Werte-Liste basierend auf der Spaltenreihenfolge
-        values = [record.get(col) for col in columns]
+# Spaltenreihenfolge fuer INSERT (einmal berechnet, Werte kommen als Tupel in dieser Reihenfolge)
+COLUMNS = (
+    "timestamp_iso", "datum_utc", "uhrzeit_utc", "gateway_id",
+    "temp1", "feuchte1", "temp2", "feuchte2", "temp3", "feuchte3",
+    "temp_in", "feuchte_in", "battery_ok"
+)
+INSERT_SQL = f"INSERT INTO measurements ({', '.join(COLUMNS)}) VALUES ({', '.join(['?'] * len(COLUMNS))})"
+COL_TEMP_IN = COLUMNS.index("temp_in")
+
+# Payload-Keys der numerischen Spalten temp1 .. feuchte_in (gleiche Reihenfolge)
+NUMERIC_KEYS = (
+    "temperature1", "humidity1", "temperature2", "humidity2",
+    "temperature3", "humidity3", "temperatureIN", "humidityIN",
+)
+
+_buffer = []
+_buffer_lock = threading.Lock()   # on_message (MQTT-Thread) und Flush-Timer im Haupt-Thread
+_last_flush = time.monotonic()
+
+def flush_records():
+    """Schreibt alle gepufferten Datensaetze mit executemany in einer Transaktion."""
+    global _last_flush
+    with _buffer_lock:
+        if not _buffer:
+            return
+        rows = _buffer[:]
+        _buffer.clear()
+        _last_flush = time.monotonic()
 
-        sql = f"INSERT INTO measurements ({', '.join(columns)}) VALUES ({placeholders})"
-        cursor.execute(sql, values)
-        
-        conn.commit()
-        conn.close()
+    try:
+        with _db_lock:
+            conn = get_db()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(INSERT_SQL, rows)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
         
     except sqlite3.Error as e:
-        print(f"❌ Fehler beim Einfügen des Datensatzes: {e}")
-
-# --- FUNKTION ZUR FEHLERBEHANDLUNG ---
-
-def safe_extract_value(data, key):
-    """
-    Extrahiert einen Messwert robust:
-    1. Holt den Wert zum Key.
-    2. Wenn es ein Array ist, nimmt es den ersten Wert [0].
-    3. Wenn es ein einzelner Wert ist, gibt es diesen zurück.
-    4. Gibt None zurück, wenn der Key fehlt oder der Wert ungültig ist.
-    """
-    value = data.get(key)
-    
-    if isinstance(value, list):
-        # Fall 1: Wert liegt als Array vor (wie in deinem Beispiel)
-        return value[0] if value else None
-    elif isinstance(value, (int, float)):
-        # Fall 2: Wert liegt als einfacher numerischer Typ vor
-        return value
-    elif isinstance(value, str) and value.replace('.', '', 1).isdigit():
-        # Fall 3: Wert liegt als parsbarer String vor
-        try:
-            return float(value)
-        except ValueError:
-            return None
-    
-    # Fall 4: Wert fehlt oder ist None
-    return None
+        print(f"❌ Fehler beim Einfügen von {len(rows)} Datensätzen: {e}")
+
+def flush_if_due():
+    """Zeitgesteuerter Flush (auch wenn gerade keine Nachrichten kommen)."""
+    if _buffer and time.monotonic() - _last_flush >= FLUSH_INTERVAL_S:
+        flush_records()
+
+def insert_record(values):
+    """Puffert einen Messdatensatz (Tupel in COLUMNS-Reihenfolge); geschrieben wird gebuendelt."""
+    with _buffer_lock:
+        _buffer.append(values)
+        full = len(_buffer) >= BATCH_SIZE
+    if full:
+        flush_records()
+    else:
+        flush_if_due()
 
 # --- MQTT HANDLER ---
 
@@ -109,43 +169,30 @@ def on_connect(client, userdata, flags, rc):
 
 def on_message(client, userdata, msg):
     try:
-        payload = json.loads(msg.payload.decode("utf-8"))
+        payload = _loads(msg.payload)
         
         if isinstance(payload, dict):
             
             # --- 1. Zeitstempel-Verarbeitung ---
             utc_timestamp_iso = payload.get("utms", "")
-            datum = utc_timestamp_iso[:10] if utc_timestamp_iso else None
-            uhrzeit = utc_timestamp_iso[11:19] if utc_timestamp_iso else None
+            datum, uhrzeit = split_utms(utc_timestamp_iso)
 
             # --- 2. Batteriestatus-Verarbeitung ---
-            batterie_ok = payload.get("battery", "").lower() == "ok"
+            batterie_ok = normalize_battery(payload.get("battery"))
             gateway_id = payload.get("id")
 
-            # --- 4. Daten-Record erstellen (mit robuster Extraktion) ---
-            record = {
-                "timestamp_iso": utc_timestamp_iso,
-                "datum_utc": datum,
-                "uhrzeit_utc": uhrzeit,
-                "gateway_id": gateway_id,
-                
-                # Robuste Extraktion der numerischen Werte
-                "temp1": safe_extract_value(payload, "temperature1"),
-                "feuchte1": safe_extract_value(payload, "humidity1"),
-                "temp2": safe_extract_value(payload, "temperature2"),
-                "feuchte2": safe_extract_value(payload, "humidity2"),
-                "temp3": safe_extract_value(payload, "temperature3"),
-                "feuchte3": safe_extract_value(payload, "humidity3"),
-                "temp_in": safe_extract_value(payload, "temperatureIN"),
-                "feuchte_in": safe_extract_value(payload, "humidityIN"),
-                
-                "battery_ok": batterie_ok
-            }
+            # --- 4. Werte-Tupel direkt in Spaltenreihenfolge (mit robuster Extraktion) ---
+            values = (
+                utc_timestamp_iso, datum, uhrzeit, gateway_id,
+                *[safe_extract_value(payload, k) for k in NUMERIC_KEYS],
+                batterie_ok,
+            )
             
             # 5. In SQLite-Datenbank einfügen
-            insert_record(record)
+            insert_record(values)
             
-            print(f"✅ id: {gateway_id} | temp_in: {record['temp_in']} | Eingefügt.")
+            # pro Nachricht nur auf DEBUG (deaktiviert -> kein Formatieren)
+            log.debug("✅ id: %s | temp_in: %s | Gepuffert.", gateway_id, values[COL_TEMP_IN])
         
         else:
             print(f"ℹ️ {msg.topic}: {msg.payload.decode('utf-8')} (Nicht-JSON-Nachricht ignoriert)")
@@ -157,6 +204,8 @@ def on_message(client, userdata, msg):
 
 
 # --- HAUPTPROGRAMM ---
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
 # 1. Datenbank initialisieren
 initialize_database()
 
@@ -168,6 +217,16 @@ print(f"Verbinde zu Broker {BROKER}...")
 
 try:
     client.connect(BROKER, 1883, 60)
-    client.loop_forever()
+    # MQTT im Hintergrund-Thread, Haupt-Thread sorgt fuer den zeitgesteuerten Flush
+    client.loop_start()
+    while True:
+        time.sleep(1.0)
+        flush_if_due()
+except KeyboardInterrupt:
+    pass
 except Exception as e:
-    print(f"❌ Verbindungsfehler: {e}")
\ No newline at end of file
+    print(f"❌ Verbindungsfehler: {e}")
+finally:
+    client.loop_stop()
+    flush_records()
+    close_db()
\ No newline at end of file
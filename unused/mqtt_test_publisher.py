@@ -1,7 +1,14 @@
 import json
 import time
-from datetime import datetime
-from paho.mqtt import publish
+from paho.mqtt import client as mqtt
+
+# orjson serialisiert direkt nach bytes (schneller), Fallback auf json
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
 
 # --- KONFIGURATION ---
 BROKER_ADDRESS = "127.0.0.1"
@@ -11,13 +18,16 @@ MQTT_TOPIC = "mobilealerts/status"
 SENSOR_GARTEN_ID = "11566802925f"
 SENSOR_GATEWAY_ID = "001d8c0e0851"
 
-def generate_payload(sensor_id, temp1, hum1, temp2, battery_ok=True, temp_in=None):
+def generate_payload(sensor_id, temp1, hum1, temp2, battery_ok=True, temp_in=None, now=None):
     """
     Erzeugt einen simulierten Mobile Alerts JSON Payload.
     Die Werte werden teilweise absichtlich als Array formatiert,
     um die Fehlerbehandlung im Logger zu testen.
+    now: bereits formatierter UTC-Zeitstempel (sonst aktuelle Zeit).
     """
-    now = datetime.utcnow().isoformat(timespec='seconds') + 'Z'
+    if now is None:
+        # direkt aus time.gmtime formatiert, ohne datetime-Objekt
+        now = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
     
     payload = {
         # Grundlegende Identifikationsdaten
@@ -48,17 +58,39 @@ def generate_payload(sensor_id, temp1, hum1, temp2, battery_ok=True, temp_in=Non
 def publish_test_data(broker):
     """Generiert und sendet mehrere Testdatensätze."""
     print(f"Starte Senden der Testdaten an Broker: {broker}")
-    
+
+    # Eine Verbindung für alle Testdaten (statt CONNECT/DISCONNECT pro publish.single)
+    client = mqtt.Client()
+    try:
+        client.connect(broker)
+    except Exception as e:
+        print(f"   ❌ Verbindungsfehler: {e}")
+        return
+    client.loop_start()
+    try:
+        _publish_all(client)
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+    print("\nAlle Testdaten gesendet.")
+
+def _send(client, payload):
+    """Sendet einen Payload über die bestehende Verbindung und wartet auf die Auslieferung."""
+    try:
+        client.publish(MQTT_TOPIC, _dumps(payload)).wait_for_publish(timeout=5.0)
+        print("   -> Gesendet.")
+    except Exception as e:
+        print(f"   ❌ Fehler beim Senden: {e}")
+
+def _publish_all(client):
+    """Die drei Testdatensätze nacheinander (je 1 s Abstand) senden."""
     # 1. Messung für den Garten-Sensor (Normalfall)
     temp_garden = 15.3
     payload1 = generate_payload(SENSOR_GARTEN_ID, temp_garden, 60.5, 12.0)
     
     print(f"\n[1] Sende Garten-Sensor Daten ({temp_garden}°C)...")
-    try:
-        publish.single(MQTT_TOPIC, json.dumps(payload1), hostname=broker)
-        print("   -> Gesendet.")
-    except Exception as e:
-        print(f"   ❌ Fehler beim Senden: {e}")
+    _send(client, payload1)
 
     time.sleep(1)
 
@@ -67,11 +99,7 @@ def publish_test_data(broker):
     payload2 = generate_payload(SENSOR_GATEWAY_ID, temp_gateway, 42.1, 21.0, temp_in=temp_gateway)
     
     print(f"[2] Sende Gateway Daten ({temp_gateway}°C, mit TempIN)...")
-    try:
-        publish.single(MQTT_TOPIC, json.dumps(payload2), hostname=broker)
-        print("   -> Gesendet.")
-    except Exception as e:
-        print(f"   ❌ Fehler beim Senden: {e}")
+    _send(client, payload2)
 
     time.sleep(1)
     
@@ -80,13 +108,7 @@ def publish_test_data(broker):
     payload3 = generate_payload(SENSOR_GARTEN_ID, temp_extreme, 95.0, -6.0, battery_ok=False)
     
     print(f"[3] Sende Garten-Sensor Extremwert ({temp_extreme}°C, LOW Battery)...")
-    try:
-        publish.single(MQTT_TOPIC, json.dumps(payload3), hostname=broker)
-        print("   -> Gesendet.")
-    except Exception as e:
-        print(f"   ❌ Fehler beim Senden: {e}")
-
-    print("\nAlle Testdaten gesendet.")
+    _send(client, payload3)
 
 if __name__ == "__main__":
     publish_test_data(BROKER_ADDRESS)
\ No newline at end of file
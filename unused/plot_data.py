@@ -10,12 +10,39 @@ import sqlite3
 import datetime
 import argparse
 
-import pandas as pd
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # nur PDF-Export, kein GUI-Backend initialisieren
 import matplotlib.pyplot as plt
 from matplotlib.dates import DateFormatter, MinuteLocator, HourLocator
 
 import config
 
+# Mehr Punkte kann ein 12-Zoll-Plot ohnehin nicht aufloesen -> SQLite mittelt auf so viele Buckets
+PLOT_TARGET_POINTS = 2000
+
+# Lese-Verbindung: heisse Seiten im Speicher halten
+READ_PRAGMAS = (
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+PLOT_DPI = 150  # Aufloesung der gerasterten Linien im PDF (Achsen/Text bleiben Vektor)
+
+# Eine Figure fuer alle Aufrufe im selben Prozess (Backend-/Font-Setup nur einmal)
+_FIG = None
+
+
+def _get_figure():
+    """Liefert die wiederverwendete, geleerte Figure."""
+    global _FIG
+    if _FIG is None:
+        _FIG = plt.figure(figsize=(12, 6))
+    else:
+        _FIG.clf()
+    return _FIG
+
 
 def create_multi_plot(sensor_keys, start_time_str=None, end_time_str=None):
     """
@@ -49,43 +76,62 @@ def create_multi_plot(sensor_keys, start_time_str=None, end_time_str=None):
     conn = None
     try:
         conn = sqlite3.connect(config.DB_FILE)
+        for pragma in READ_PRAGMAS:
+            conn.execute(pragma)
+
+        # Index auf der Zeitspalte -> Zeitfilter als Range-Scan statt Full-Table-Scan
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{config.TABLE_NAME}_{time_column_name} "
+            f"ON {config.TABLE_NAME}({time_column_name})"
+        )
 
         # --- 2. SQL-Abfrage erstellen ---
-        select_columns = [time_column_name] + db_column_names
-        select_columns_str = ", ".join(select_columns)
+        epoch_expr = f"CAST(strftime('%s', {time_column_name}) AS INTEGER)"
 
-        sql_query = f"""
-            SELECT {select_columns_str}
-            FROM {config.TABLE_NAME}
-            WHERE 1=1
-        """
+        # Nur Zeilen mit gueltiger Zeit und mindestens einem Sensorwert (ersetzt dropna)
+        any_value_sql = " OR ".join(f"{c} IS NOT NULL" for c in db_column_names)
+        where_sql = f"WHERE {epoch_expr} IS NOT NULL AND ({any_value_sql})"
 
-        # Zeitfilter hinzufügen
+        # Zeitfilter als Parameter (keine Werte im SQL-Text)
+        params = {}
         if start_time_str:
-            sql_query += f" AND {time_column_name} >= '{start_time_str}'"
+            where_sql += f" AND {time_column_name} >= :start"
+            params["start"] = start_time_str
         if end_time_str:
-            sql_query += f" AND {time_column_name} <= '{end_time_str}'"
-
-        sql_query += f" ORDER BY {time_column_name} ASC;"
-
-        # Daten in Pandas DataFrame laden
-        df = pd.read_sql(sql_query, conn)
-
-        if df.empty:
-            print("ℹ️ Keine Daten für den gewählten Zeitraum gefunden.")
+            where_sql += f" AND {time_column_name} <= :end"
+            params["end"] = end_time_str
+
+        # Bucket-Breite (s) aus der Zeitspanne, damit nur ~PLOT_TARGET_POINTS Zeilen geladen werden
+        t_first, t_last = conn.execute(
+            f"SELECT MIN({epoch_expr}), MAX({epoch_expr}) FROM {config.TABLE_NAME} {where_sql}",
+            params,
+        ).fetchone()
+        if t_first is None:
+            print("ℹ️ Keine verwertbaren Daten für die gewählten Sensoren und Zeitraum gefunden.")
             return
+        params["bucket"] = max(1, (t_last - t_first) // PLOT_TARGET_POINTS)
 
-        # --- 3. Datenvorbereitung ---
-        # Zeitspalte in datetime konvertieren
-        df[time_column_name] = pd.to_datetime(df[time_column_name], errors='coerce')
-        df.dropna(subset=[time_column_name], inplace=True)
+        # Mittelwert pro Bucket; Zeit = Bucket-Anfang (UTC, ISO)
+        avg_columns_str = ", ".join(f"AVG({c}) AS {c}" for c in db_column_names)
+        sql_query = f"""
+            SELECT datetime({epoch_expr} / :bucket * :bucket, 'unixepoch') AS {time_column_name},
+                   {avg_columns_str}
+            FROM {config.TABLE_NAME}
+            {where_sql}
+            GROUP BY {epoch_expr} / :bucket
+            ORDER BY {epoch_expr} / :bucket ASC;
+        """
 
-        # Zeilen entfernen, wo alle Sensorwerte NULL sind
-        df.dropna(subset=db_column_names, how='all', inplace=True)
+        # Zeilen direkt in NumPy-Spalten (kein DataFrame)
+        rows = conn.execute(sql_query, params).fetchall()
 
-        if df.empty:
-            print("ℹ️ Keine verwertbaren Daten für die gewählten Sensoren und Zeitraum gefunden.")
-            return
+        # --- 3. Datenvorbereitung ---
+        # WHERE garantiert Zeit + mindestens einen Wert pro Bucket -> keine Nachfilterung
+        columns = list(zip(*rows))
+        times = np.array(columns[0], dtype="datetime64[s]")
+        # Sensorwerte: NULL (Bucket ohne Wert fuer diese Spalte) -> NaN
+        values = np.array(columns[1:], dtype=np.float64)
+        series = {col: values[i] for i, col in enumerate(db_column_names)}
 
         # --- 4. Plot erstellen ---
 
@@ -94,7 +140,8 @@ def create_multi_plot(sensor_keys, start_time_str=None, end_time_str=None):
         output_filename = f"plot_{sensor_list_str}_{timestamp_str}.pdf"
         output_path = os.path.join(config.REPORTS_PATH, output_filename)
 
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig = _get_figure()
+        ax = fig.add_subplot()
 
         # aus valid_keys die DB-Spalten bestimmen
         db_cols = [config.SENSOR_ALIASES[k] for k in valid_keys]
@@ -127,10 +174,11 @@ def create_multi_plot(sensor_keys, start_time_str=None, end_time_str=None):
                 target_ax = ax2
 
             target_ax.plot(
-                df[time_column_name],
-                df[col],
+                times,
+                series[col],
                 label=f'{key} [{col}]',
-                linewidth=2
+                linewidth=2,
+                rasterized=True
             )
 
             # für Limits merken
@@ -140,8 +188,8 @@ def create_multi_plot(sensor_keys, start_time_str=None, end_time_str=None):
                 right_axis_cols.append(col)
 
         # Titel
-        t_min = df[time_column_name].min()
-        t_max = df[time_column_name].max()
+        t_min = times.min().astype(datetime.datetime)
+        t_max = times.max().astype(datetime.datetime)
         plot_title = ", ".join(valid_keys)
         ax.set_title(f"Verlauf von: {plot_title}\nVon {t_min} bis {t_max}", fontsize=14)
         ax.set_xlabel("Zeit (UTC)")
@@ -183,7 +231,7 @@ def create_multi_plot(sensor_keys, start_time_str=None, end_time_str=None):
             ax2.set_ylim(*right_limits)
 
         # X-Achsen-Formatierung
-        time_diff = df[time_column_name].max() - df[time_column_name].min()
+        time_diff = t_max - t_min
         if time_diff.total_seconds() < 3600 * 5:      # < 5 h
             ax.xaxis.set_major_formatter(DateFormatter('%H:%M'))
             ax.xaxis.set_major_locator(MinuteLocator(interval=15))
@@ -209,9 +257,8 @@ def create_multi_plot(sensor_keys, start_time_str=None, end_time_str=None):
 
         # Layout anpassen und PDF speichern
         os.makedirs(config.REPORTS_PATH, exist_ok=True)
-        plt.tight_layout()
-        plt.savefig(output_path, format='pdf')
-        plt.close(fig)
+        fig.tight_layout()
+        fig.savefig(output_path, format='pdf', dpi=PLOT_DPI)
 
         print(f"\n✅ Graph erfolgreich erstellt und gespeichert unter:\n{output_path}")
 
@@ -1,24 +1,21 @@
 import sqlite3
-import pandas as pd
-import matplotlib.pyplot as plt
+# numpy/pandas, matplotlib und reportlab werden erst in den Funktionen importiert,
+# die sie brauchen: --test-email lädt so keine dieser schweren Bibliotheken
 import io
 import smtplib
 import argparse
+from contextlib import contextmanager
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email.mime.text import MIMEText
 from email import encoders
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
-from reportlab.lib.units import inch
 from datetime import datetime, timedelta, timezone # <-- HINZUGEFÜGT: timezone
 
 # --- KONFIGURATION START ---
 DB_FILE = "log/mobilealerts.db"
 REPORT_FILENAME = "log/MobileAlerts_Wochenbericht.pdf"
 DAYS_AGO = 7 # Berichtszeitraum: Letzten 7 Tage
+PLOT_DPI = 100 # Diagramm-PNG: 8x4 Zoll -> 800x400 px, unabhängig von einer lokalen matplotlibrc
 
 # E-MAIL KONFIGURATION (MUSS ANGEPASST WERDEN)
 SMTP_SERVER = "mail.gmx.net"  # Beispiel: 'smtp.gmail.com'
@@ -30,47 +27,70 @@ SENDER_EMAIL = SMTP_USER
 # --- KONFIGURATION ENDE ---
 
 
-def test_email_connection():
-    """Testet die Verbindung zum SMTP-Server und sendet eine einfache Test-E-Mail."""
-    print("\n--- STARTE E-MAIL VERBINDUNGSTEST ---")
-    
-    msg = MIMEMultipart()
-    msg['From'] = SENDER_EMAIL
-    msg['To'] = RECIPIENT_EMAIL
-    msg['Subject'] = "Mobile Alerts Test-E-Mail"
+def ensure_indexes(conn):
+    """Index auf timestamp_iso (Zeitfilter als Index-Seek statt Full-Scan) + Lese-PRAGMAs."""
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_measurements_timestamp_iso ON measurements(timestamp_iso)")
 
-    body = f"Dies ist eine automatische Test-E-Mail vom Mobile Alerts Bericht-Generator ({datetime.now().strftime('%d.%m.%Y %H:%M')}). Ihre SMTP-Konfiguration ist erfolgreich."
-    msg.attach(MIMEText(body, 'plain'))
-    
+
+
+@contextmanager
+def smtp_session():
+    """
+    Eine angemeldete SMTP-Verbindung (STARTTLS + Login) für alle Mails eines Laufs.
+    TLS-Handshake und AUTH fallen so nur einmal an; quit() beim Verlassen.
+    """
+    print(f"Verbinde mit {SMTP_SERVER}:{SMTP_PORT}...")
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
     try:
-        print(f"Versuche, eine Verbindung zu {SMTP_SERVER}:{SMTP_PORT} herzustellen...")
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
         # server.set_debuglevel(1) # Kann zur detaillierten Fehlerbehebung aktiviert werden
-        server.starttls()
-        print("Versuche, mich anzumelden...")
+        server.starttls()  # Startet TLS-Verschlüsselung (wichtig!)
         server.login(SMTP_USER, SMTP_PASSWORD)
-        
-        print(f"Sende Test-E-Mail an {RECIPIENT_EMAIL}...")
-        server.sendmail(SENDER_EMAIL, RECIPIENT_EMAIL, msg.as_string())
-        
-        server.quit()
-        print("✅ E-Mail-Test erfolgreich! Bitte überprüfen Sie Ihren Posteingang.")
-        return True
-        
+        yield server
+    finally:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+
+def send_with_session(send_fn, *args):
+    """Öffnet eine SMTP-Sitzung, ruft send_fn(smtp, *args) auf und meldet Fehler."""
+    try:
+        with smtp_session() as smtp:
+            return send_fn(smtp, *args)
     except smtplib.SMTPAuthenticationError:
         print("❌ SMTP-Authentifizierungsfehler! Überprüfen Sie Benutzername/Passwort oder App-Passwörter.")
     except smtplib.SMTPServerDisconnected:
         print("❌ SMTP-Server-Fehler: Server hat die Verbindung unerwartet getrennt.")
     except Exception as e:
-        print(f"❌ Allgemeiner Fehler beim E-Mail-Test (Prüfen Sie Server/Port/TLS): {e}")
-    
+        print(f"❌ Fehler beim E-Mail-Versand (Prüfen Sie Server/Port/TLS): {e}")
     return False
-    print("--- E-MAIL VERBINDUNGSTEST BEENDET ---")
+
+
+def test_email_connection(smtp):
+    """Sendet über die SMTP-Sitzung eine einfache Test-E-Mail."""
+    print("\n--- STARTE E-MAIL VERBINDUNGSTEST ---")
+    
+    msg = MIMEMultipart()
+    msg['From'] = SENDER_EMAIL
+    msg['To'] = RECIPIENT_EMAIL
+    msg['Subject'] = "Mobile Alerts Test-E-Mail"
+
+    body = f"Dies ist eine automatische Test-E-Mail vom Mobile Alerts Bericht-Generator ({datetime.now().strftime('%d.%m.%Y %H:%M')}). Ihre SMTP-Konfiguration ist erfolgreich."
+    msg.attach(MIMEText(body, 'plain'))
+    
+    print(f"Sende Test-E-Mail an {RECIPIENT_EMAIL}...")
+    smtp.sendmail(SENDER_EMAIL, RECIPIENT_EMAIL, msg.as_string())
+    print("✅ E-Mail-Test erfolgreich! Bitte überprüfen Sie Ihren Posteingang.")
+    return True
 
 
 def fetch_data_and_analyze(db_file, days_ago):
     """Holt die Daten der letzten X Tage aus der SQLite-DB und aggregiert sie."""
     print("Starte Datenabfrage und Analyse...")
+    import numpy as np
+    import pandas as pd
     
     # Berechne den Startzeitpunkt (X Tage in der Vergangenheit)
     cutoff_date = datetime.now() - timedelta(days=days_ago)
@@ -78,14 +98,37 @@ def fetch_data_and_analyze(db_file, days_ago):
     
     try:
         conn = sqlite3.connect(db_file)
-        
-        # Abfrage: Wähle alle Messungen seit dem Stichtag.
-        query = f"""
-            SELECT * FROM measurements 
-            WHERE timestamp_iso >= '{cutoff_date_iso}' 
+        ensure_indexes(conn)
+
+        # Tagesübersicht (Mittelwert, Min/Max der Gartentemperatur Temp1) rechnet SQLite direkt,
+        # nach Python kommt nur eine Zeile pro Tag.
+        # Beachte: Dies aggregiert alle Sensoren zusammen! Idealerweise aggregiert man nach Sensor_Name.
+        summary_query = """
+            SELECT date(timestamp_iso) AS day,
+                   ROUND(AVG(temp1), 1) AS mean,
+                   ROUND(MIN(temp1), 1) AS min,
+                   ROUND(MAX(temp1), 1) AS max
+            FROM measurements
+            WHERE timestamp_iso >= ?
+            GROUP BY day
+            ORDER BY day
+        """
+        daily_summary = pd.read_sql_query(summary_query, conn, params=(cutoff_date_iso,), index_col='day')
+
+        # Für das Diagramm nur Zeit + Temp1 (statt SELECT *)
+        plot_query = """
+            SELECT timestamp_iso, temp1 FROM measurements
+            WHERE timestamp_iso >= ? AND temp1 IS NOT NULL
             ORDER BY timestamp_iso
         """
-        df = pd.read_sql_query(query, conn)
+        # Zwei Spalten direkt über den Cursor lesen (ohne pd.read_sql Typ-Erkennung pro Spalte),
+        # Werte per np.fromiter als float32, Zeitstempel einmal parsen und als Index setzen
+        rows = conn.execute(plot_query, (cutoff_date_iso,)).fetchall()
+        ts_col, temp_col = zip(*rows) if rows else ((), ())
+        df = pd.DataFrame(
+            {'temp1': np.fromiter(temp_col, dtype=np.float32, count=len(rows))},
+            index=pd.DatetimeIndex(pd.to_datetime(list(ts_col)), name='timestamp_iso'),
+        )
         conn.close()
 
     except Exception as e:
@@ -96,33 +139,46 @@ def fetch_data_and_analyze(db_file, days_ago):
         print("ℹ️ Keine Daten für den Berichtszeitraum gefunden.")
         return df, None
 
-    # Datenvorbereitung
-    df['timestamp_iso'] = pd.to_datetime(df['timestamp_iso'])
-    # Setze den Zeitstempel als Index für die Zeitreihenanalyse
-    df.set_index('timestamp_iso', inplace=True)
-
-    # Aggregation: Berechne den Tagesmittelwert und Min/Max für die Gartentemperatur (Temp1)
-    # Beachte: Dies aggregiert alle Sensoren zusammen! Idealerweise aggregiert man nach Sensor_Name.
-    # Wir nehmen hier nur Temp1 als Beispiel.
-    daily_summary = df.groupby(df.index.date)['temp1'].agg(['mean', 'min', 'max']).round(1)
     daily_summary.index = pd.to_datetime(daily_summary.index).strftime('%d.%m.')
     
     return df, daily_summary
 
+def downsample_for_plot(data, fig, how='mean'):
+    """
+    Reduziert eine Zeitreihe (Series/DataFrame mit DatetimeIndex) auf ca. 2 Punkte pro
+    Pixel der Figure-Breite; mehr Punkte kann Agg nicht darstellen.
+    """
+    n_target = int(fig.get_size_inches()[0] * fig.dpi) * 2
+    if len(data) <= n_target:
+        return data
+    span_s = (data.index[-1] - data.index[0]).total_seconds()
+    bucket_s = max(1, int(span_s / n_target))
+    return data.resample(f'{bucket_s}s').agg(how).dropna(how='all')
+
 def create_plot(df):
     """Erstellt ein Liniendiagramm der Temperatur über die Zeit."""
     print("Erstelle Diagramm...")
+    import matplotlib
+    matplotlib.use('Agg')  # headless: kein GUI-Backend suchen/laden
+    import matplotlib.pyplot as plt
+    # Agg darf Teilpixel-Stützpunkte langer Zeitreihen weglassen und zeichnet in Stücken
+    plt.rcParams.update({
+        'path.simplify': True,
+        'path.simplify_threshold': 1.0,
+        'agg.path.chunksize': 10000,
+    })
     
     # Nutze nur die letzten 7 Tage
     # FIX: Nutze timezone.utc, um den Vergleich UTC-aware zu machen.
     seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
-    df_plot = df[df.index >= seven_days_ago].copy()
+    df_plot = df[df.index >= seven_days_ago]  # nur gelesen -> keine Kopie nötig
 
     # Erstelle das Diagramm (z.B. Temperaturverlauf von Temp1)
     fig, ax = plt.subplots(figsize=(8, 4))
     
     # Filtere NaN-Werte für eine saubere Darstellung
     temp_data = df_plot['temp1'].dropna()
+    temp_data = downsample_for_plot(temp_data, fig)
     
     ax.plot(temp_data.index, temp_data.values, label='Temperatur (Temp1) [°C]', color='tab:red', linewidth=1)
     
@@ -138,7 +194,10 @@ def create_plot(df):
     
     # Speichere das Diagramm in einem BytesIO-Objekt (im Speicher)
     img_data = io.BytesIO()
-    plt.savefig(img_data, format='png')
+    # Schwache PNG-Kompression: ReportLab dekodiert das Bild ohnehin und komprimiert es im PDF neu
+    plt.savefig(img_data, format='png', dpi=PLOT_DPI,
+                pil_kwargs={'compress_level': 1, 'optimize': False},
+                metadata={'Software': None})
     plt.close(fig) # Schließe die Matplotlib-Figur
     
     print("✅ Diagramm erstellt.")
@@ -148,6 +207,12 @@ def create_plot(df):
 def create_pdf(daily_summary, plot_img_data):
     """Erstellt das PDF-Dokument mit ReportLab."""
     print("Generiere PDF-Bericht...")
+    import numpy as np
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, LongTable, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
     
     doc = SimpleDocTemplate(REPORT_FILENAME, pagesize=A4,
                             rightMargin=72, leftMargin=72,
@@ -170,9 +235,8 @@ def create_pdf(daily_summary, plot_img_data):
     
     # Füge das Bild aus dem BytesIO-Stream ein
     if plot_img_data:
-        img = RLImage(plot_img_data)
-        img.drawHeight = 3.5 * inch
-        img.drawWidth = 6 * inch
+        # Zielgrösse direkt im Konstruktor (statt drawWidth/drawHeight nachträglich zu überschreiben)
+        img = RLImage(plot_img_data, width=6 * inch, height=3.5 * inch)
         story.append(img)
         story.append(Spacer(1, 0.25 * inch))
     else:
@@ -183,18 +247,15 @@ def create_pdf(daily_summary, plot_img_data):
     # --- 4. DATENTABELLE ---
     story.append(Paragraph("Tägliche Übersicht (Temp1)", styles['Heading2']))
     
-    # Bereite die Daten für die ReportLab Tabelle vor
-    table_data = [['Datum', 'Minimum (°C)', 'Maximum (°C)', 'Mittelwert (°C)']]
-    for date, row in daily_summary.iterrows():
-        table_data.append([
-            str(date),
-            str(row['min']),
-            str(row['max']),
-            str(row['mean'])
-        ])
+    # Bereite die Daten für die ReportLab Tabelle vor (ganze Spalten formatieren statt Zeile für Zeile)
+    header = ['Datum', 'Minimum (°C)', 'Maximum (°C)', 'Mittelwert (°C)']
+    values = np.char.mod('%.1f', daily_summary[['min', 'max', 'mean']].to_numpy(dtype=float))
+    dates = daily_summary.index.to_numpy(dtype=str)
+    table_data = [header] + np.column_stack([dates, values]).tolist()
 
     # Erstelle die Tabelle und wende Styles an
-    table = Table(table_data, colWidths=[1.5*inch]*4)
+    # LongTable: lineare Seitenumbruch-Berechnung bei vielen Tagen, Kopfzeile auf jeder Seite
+    table = LongTable(table_data, colWidths=[1.5*inch]*4, repeatRows=1)
     table.setStyle(TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -215,8 +276,8 @@ def create_pdf(daily_summary, plot_img_data):
     doc.build(story)
     print(f"✅ PDF '{REPORT_FILENAME}' erfolgreich generiert.")
 
-def send_email(file_path):
-    """Sendet die erstellte PDF-Datei als Anhang per E-Mail."""
+def send_email(smtp, file_path):
+    """Sendet die erstellte PDF-Datei als Anhang über die SMTP-Sitzung."""
     print("Starte E-Mail-Versand...")
     
     msg = MIMEMultipart()
@@ -239,20 +300,11 @@ def send_email(file_path):
         msg.attach(part)
     except FileNotFoundError:
         print(f"❌ Dateifehler: {file_path} nicht gefunden.")
-        return
+        return False
 
-    # Verbindung zum SMTP-Server herstellen und E-Mail senden
-    try:
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()  # Startet TLS-Verschlüsselung (wichtig!)
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.sendmail(SENDER_EMAIL, RECIPIENT_EMAIL, msg.as_string())
-        server.quit()
-        print("✅ E-Mail erfolgreich versendet!")
-    except smtplib.SMTPAuthenticationError:
-        print("❌ SMTP-Authentifizierungsfehler! Überprüfe Benutzername/Passwort oder App-Passwörter.")
-    except Exception as e:
-        print(f"❌ Fehler beim E-Mail-Versand: {e}")
+    smtp.sendmail(SENDER_EMAIL, RECIPIENT_EMAIL, msg.as_string())
+    print("✅ E-Mail erfolgreich versendet!")
+    return True
 
 
 def main():
@@ -262,8 +314,10 @@ def main():
     parser.add_argument('--test-email', action='store_true', help="Führt nur einen Test der E-Mail-Konfiguration durch.")
     args = parser.parse_args()
 
+    # Pro Lauf eine SMTP-Sitzung, erst direkt vor dem Versand geöffnet
+    # (sonst liefe sie während Datenabfrage/PDF in den Server-Timeout)
     if args.test_email:
-        test_email_connection()
+        send_with_session(test_email_connection)
         return
 
     # 1. Daten holen und analysieren
@@ -271,7 +325,7 @@ def main():
     
     if df.empty:
         # Versuch, eine E-Mail ohne Anhang zu senden, falls keine Daten da sind
-        send_empty_report()
+        send_with_session(send_empty_report)
         return
 
     # 2. Plot erstellen
@@ -281,10 +335,10 @@ def main():
     create_pdf(daily_summary, plot_img_data)
 
     # 4. E-Mail senden
-    send_email(REPORT_FILENAME)
+    send_with_session(send_email, REPORT_FILENAME)
 
-def send_empty_report():
-    """Sendet eine Benachrichtigung, wenn keine Daten verfügbar sind."""
+def send_empty_report(smtp):
+    """Sendet über die SMTP-Sitzung eine Benachrichtigung, wenn keine Daten verfügbar sind."""
     print("Starte Benachrichtigung über leeren Bericht...")
     
     msg = MIMEMultipart()
@@ -295,15 +349,9 @@ def send_empty_report():
     body = f"Achtung: Der automatisierte Wochenbericht konnte keine Messdaten für die letzten {DAYS_AGO} Tage finden. Bitte prüfen Sie den Logger-Dienst."
     msg.attach(MIMEText(body, 'plain'))
 
-    try:
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.sendmail(SENDER_EMAIL, RECIPIENT_EMAIL, msg.as_string())
-        server.quit()
-        print("✅ E-Mail-Benachrichtigung gesendet.")
-    except Exception as e:
-        print(f"❌ Fehler beim Senden der Benachrichtigung: {e}")
+    smtp.sendmail(SENDER_EMAIL, RECIPIENT_EMAIL, msg.as_string())
+    print("✅ E-Mail-Benachrichtigung gesendet.")
+    return True
 
 
 if __name__ == "__main__":
@@ -1,11 +1,22 @@
 import sqlite3
 import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use('Agg')  # headless: kein GUI-Backend suchen/laden
+# OO-API statt pyplot: kein globaler Figure-Manager/State, Canvas direkt Agg
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+# Agg darf Teilpixel-Stützpunkte langer Zeitreihen weglassen und zeichnet in Stücken
+matplotlib.rcParams.update({
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+    'agg.path.chunksize': 10000,
+})
 import matplotlib.dates as mdates
 import json
 import os
 import sys
-import glob
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import freeze_support
 from datetime import datetime, timedelta
 import warnings
 import pytz # NEU: Für Zeitzonen-Handling
@@ -19,46 +30,168 @@ import config
 # ⭐ WICHTIG: Ihre lokale Zeitzone definieren (z.B. Europe/Berlin für CET/CEST)
 # Prüfen Sie Ihre Zeitzone mit dem Befehl 'timedatectl' auf dem Raspberry Pi.
 LOCAL_TIMEZONE = 'Europe/Berlin' 
+LOCAL_TZ = pytz.timezone(LOCAL_TIMEZONE)  # einmal beim Laden, nicht pro Bericht
+
+# Berichte parallel in Prozessen erzeugen (None = min(Anzahl Berichte, CPU-Kerne); 1 = sequentiell)
+REPORT_WORKERS = None
 
 # --- Konstanten und Utility-Funktionen ---
 
+def new_figure():
+    """Figure + Achse für die Berichte (ohne pyplot, mit Agg-Canvas)."""
+    fig = Figure(figsize=(14, 8))
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots()
+
 def ensure_dir_exists(path):
     """Stellt sicher, dass das Verzeichnis existiert."""
     os.makedirs(path, exist_ok=True)
 
+# PDF-Listing pro log_path, einmal pro Lauf (mehrere Berichte teilen sich oft ein Verzeichnis)
+# log_path -> {Pfad: mtime}; die mtime kommt aus dem DirEntry von os.scandir (kein extra stat)
+_pdf_files = {}
+
+def list_pdf_files(log_path):
+    """Alle PDFs in log_path mit mtime (gecacht); neue/gelöschte Dateien werden nachgeführt."""
+    files = _pdf_files.get(log_path)
+    if files is None:
+        files = {}
+        try:
+            with os.scandir(log_path) as it:
+                for entry in it:
+                    if entry.name.endswith(".pdf") and entry.is_file():
+                        files[entry.path] = entry.stat().st_mtime
+        except FileNotFoundError:
+            pass  # Verzeichnis wird erst beim ersten Bericht angelegt
+        _pdf_files[log_path] = files
+    return files
+
+def register_pdf_file(log_path, file_path):
+    """Neu geschriebenes PDF in den Cache aufnehmen (nur falls log_path schon gelistet wurde)."""
+    files = _pdf_files.get(log_path)
+    if files is not None:
+        files[file_path] = os.path.getmtime(file_path)
+
 def cleanup_old_reports(log_path, report_id, max_pdfs):
     """
     Löscht die ältesten PDF-Dateien in einem Verzeichnis, 
     wenn die maximale Anzahl überschritten wird.
     """
     try:
-        # Suchmuster für die Berichte basierend auf der report_id
-        search_pattern = os.path.join(log_path, f"{report_id}_*.pdf")
-        list_of_files = glob.glob(search_pattern)
+        # Berichte dieser report_id (entspricht dem Muster "{report_id}_*.pdf")
+        prefix = f"{report_id}_"
+        all_files = list_pdf_files(log_path)
+        entries = [(mtime, path) for path, mtime in all_files.items()
+                   if os.path.basename(path).startswith(prefix)]
+
+        # Schneller Ausstieg: nichts zu löschen -> kein Sortieren
+        if len(entries) <= max_pdfs:
+            return
 
-        if len(list_of_files) > max_pdfs:
-            # Sortiert nach Änderungszeitpunkt (getmtime) - ältester zuerst
-            list_of_files.sort(key=os.path.getmtime)
-            
-            # Berechnet die Anzahl der zu löschenden Dateien
-            num_to_delete = len(list_of_files) - max_pdfs
-            
-            print(f"   🧹 Max. Limit ({max_pdfs}) überschritten. Lösche {num_to_delete} älteste Dateien.")
+        # Sortiert nach Änderungszeitpunkt - ältester zuerst
+        entries.sort()
+        
+        # Berechnet die Anzahl der zu löschenden Dateien
+        num_to_delete = len(entries) - max_pdfs
+        
+        print(f"   🧹 Max. Limit ({max_pdfs}) überschritten. Lösche {num_to_delete} älteste Dateien.")
+        
+        for _, file_to_delete in entries[:num_to_delete]:
+            os.remove(file_to_delete)
+            del all_files[file_to_delete]
+            print(f"     -> Gelöscht: {os.path.basename(file_to_delete)}")
             
-            for i in range(num_to_delete):
-                file_to_delete = list_of_files[i]
-                os.remove(file_to_delete)
-                print(f"     -> Gelöscht: {os.path.basename(file_to_delete)}")
-                
     except Exception as e:
         print(f"   ❌ Fehler bei der Archiv-Wartung in {log_path}: {e}")
 
+def open_db():
+    """Eine Lese-Verbindung für alle Berichte öffnen; PRAGMAs nur einmal setzen."""
+    conn = sqlite3.connect(config.DB_FILE)
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    return conn
+
+def ensure_indexes(conn, time_col):
+    """Index auf der Zeitspalte (Zeitfilter als Index-Seek statt Full-Scan)."""
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_measurements_{time_col} ON measurements({time_col})")
+
+def downsample_for_plot(data, fig, how='mean'):
+    """
+    Reduziert eine Zeitreihe (Series/DataFrame mit DatetimeIndex) auf ca. 2 Punkte pro
+    Pixel der Figure-Breite; mehr Punkte kann Agg nicht darstellen.
+    """
+    n_target = int(fig.get_size_inches()[0] * fig.dpi) * 2
+    if len(data) <= n_target:
+        return data
+    span_s = (data.index[-1] - data.index[0]).total_seconds()
+    bucket_s = max(1, int(span_s / n_target))
+    return data.resample(f'{bucket_s}s').agg(how).dropna(how='all')
+
+def prepare_report(report_config):
+    """
+    Baut die pro Bericht konstanten Teile (DB-Spalten, SQL-Abfrage, Achsen-Datumsformat)
+    einmal beim Laden der Konfiguration und hängt sie an das Config-Dict an.
+    """
+    db_cols = [config.COLUMN_NAMES.get(s['key']) for s in report_config['sensors']]
+    db_cols = list(dict.fromkeys(col for col in db_cols if col))
+    report_config['_db_cols'] = db_cols
+    # Messwerte als float32 einlesen (halber Speicher, Plot/Statistik brauchen keine 64 Bit)
+    report_config['_dtypes'] = {col: 'float32' for col in db_cols}
+
+    time_col = config.COLUMN_NAMES['timestamp_iso']
+    period_s = int(report_config['values_period_m']) * 60
+    agg = 'MIN' if report_config['interpolate'] == "min" else 'AVG'
+
+    # Glättung (Zeit-Buckets von values_period_m Minuten, MIN oder AVG) rechnet SQLite direkt;
+    # nach Python kommt nur eine Zeile pro Bucket. Die naiven lokalen Zeitstrings werden dafür
+    # wie UTC behandelt und unverändert zurückgegeben.
+    bucket_expr = f"(CAST(strftime('%s', {time_col}) AS INTEGER) / {period_s}) * {period_s}"
+    agg_cols_str = ", ".join(f"{agg}({col}) AS {col}" for col in db_cols)
+    report_config['_sql_query'] = f"""
+            SELECT datetime({bucket_expr}, 'unixepoch') AS bucket, {agg_cols_str}
+            FROM measurements 
+            WHERE {time_col} >= ? AND {time_col} < ?
+            GROUP BY {bucket_expr}
+            ORDER BY bucket ASC;
+        """
+
+    # X-Achsen-Formatierung
+    date_format = '%d.%m %H:%M'
+    if report_config['duration_days'] > 7:
+        date_format = '%d.%m.%Y'
+    report_config['_date_formatter'] = mdates.DateFormatter(date_format)
+
+# Geparste und vorbereitete Berichtsliste, gültig solange sich (Pfad, mtime) nicht ändert
+_reports_cache = None
+
+def load_reports_config(path):
+    """
+    Liest die Berichtskonfiguration und bereitet jeden Bericht vor (prepare_report).
+    Bei unveränderter Datei (gleiche mtime) wird die zuletzt geladene Liste wiederverwendet,
+    z.B. wenn main() in einem langlebigen Prozess mehrfach aufgerufen wird.
+    """
+    global _reports_cache
+    key = (path, os.path.getmtime(path))
+    if _reports_cache is not None and _reports_cache[0] == key:
+        return _reports_cache[1]
+
+    with open(path, 'r') as f:
+        reports = json.load(f)
+    # Konstante Teile jedes Berichts (Spalten, SQL, Datumsformat) nur einmal aufbauen
+    for report in reports:
+        prepare_report(report)
+
+    _reports_cache = (key, reports)
+    return reports
+
 # --- Hauptlogik: Datenabfrage und Plot-Generierung ---
 
-def fetch_and_plot_report(report_config):
+def fetch_and_plot_report(report_config, fig, ax, conn):
     """
     Führt die Datenabfrage, Berechnung, Glättung und PDF-Generierung für
     einen einzelnen Bericht aus.
+    fig/ax und die DB-Verbindung conn werden von main() für alle Berichte gemeinsam
+    verwendet; fig/ax werden hier nur geleert, conn wird nicht geschlossen.
     """
     report_id = report_config["report_id"]
     log_path = report_config["log_path"]
@@ -70,7 +203,7 @@ def fetch_and_plot_report(report_config):
 
     # 1. Zeitfenster definieren (NEUE, zeitzonenbewusste Berechnung)
     
-    local_tz = pytz.timezone(LOCAL_TIMEZONE)
+    local_tz = LOCAL_TZ
     
     # Heutiges Datum in lokaler Zeit (ohne Zeitangabe)
     today_local = datetime.now(local_tz).replace(hour=0, minute=0, second=0, microsecond=0)
@@ -102,88 +235,58 @@ def fetch_and_plot_report(report_config):
     
     # 3. Datenbankabfrage und Glättung
     
-    conn = None
     all_data = [] 
     
     try:
-        conn = sqlite3.connect(config.DB_FILE)
-        
-        # Liste der DB-Spaltennamen für die Abfrage
-        db_cols_to_query = [config.COLUMN_NAMES.get(s['key']) for s in report_config['sensors']]
-        db_cols_to_query = [col for col in db_cols_to_query if col]
+        # DB-Spalten und SQL-Abfrage wurden in prepare_report() vorbereitet
+        db_cols_to_query = report_config['_db_cols']
         
         if not db_cols_to_query:
             print("   ❌ Fehler: Keine gültigen Sensoren oder fehlende Spaltennamen in config.py gefunden.")
             return
 
-        time_col = config.COLUMN_NAMES['timestamp_iso']
-        select_cols_str = time_col + ", " + ", ".join(db_cols_to_query)
-        
-        # SQL-Abfrage mit Zeitfilter
-        sql_query = f"""
-            SELECT {select_cols_str}
-            FROM measurements 
-            WHERE {time_col} >= '{start_time_str}' AND {time_col} < '{end_time_str}'
-            ORDER BY {time_col} ASC;
-        """
-        
-        df_raw = pd.read_sql(sql_query, conn)
-        
-        # 🚨 Hinzugefügte Prüfung: Wenn die Abfrage Daten liefert, aber keine Zeile mit Werten
-        if df_raw.empty or len(df_raw.dropna(subset=db_cols_to_query)) == 0:
+        # Geglättete Werte pro Zeit-Bucket direkt aus SQLite (Zeitstempel als NAIVE lokale Zeit)
+        df_plot = pd.read_sql_query(report_config['_sql_query'], conn,
+                                    params=(start_time_str, end_time_str),
+                                    parse_dates=['bucket'], index_col='bucket',
+                                    dtype=report_config['_dtypes'])
+
+        # 🚨 Prüfung: Wenn die Abfrage keine Zeile mit Werten liefert
+        if not df_plot.notna().to_numpy().any():
             print("   ℹ️ Keine verwertbaren Daten für diesen Zeitraum gefunden.")
             return
 
-        # Zeitstempel konvertieren und als Index setzen
-        # Wichtig: Pandas liest den String als NAIVEN (lokalen) Zeitstempel
-        df_raw[time_col] = pd.to_datetime(df_raw[time_col]) 
-        df_raw.set_index(time_col, inplace=True)
-        
-        # DataFrame für den Plot (nach Resampling)
-        df_plot = pd.DataFrame(index=df_raw.index)
+        # Leere Buckets (keine Messung) als NaN einfügen, danach lineare Interpolation für Datenlücken
+        df_plot = df_plot.asfreq(f'{values_period_m}T').interpolate(method='linear')
+
+        # Statistik (basiert auf den resampelten/geglätteten Daten), alle Spalten auf einmal
+        col_stats = df_plot.agg(['min', 'max', 'mean'])
 
-        # Resampling und Statistik-Erstellung für jeden Sensor
         for sensor_spec in report_config['sensors']:
-            key = sensor_spec['key']
-            db_col = config.COLUMN_NAMES.get(key)
-            unit = sensor_spec['unit']
+            db_col = config.COLUMN_NAMES.get(sensor_spec['key'])
 
-            if db_col not in df_raw.columns:
+            if db_col not in df_plot.columns:
                 print(f"   ⚠️ Spalte '{db_col}' nicht in der Datenbank gefunden. Sensor übersprungen.")
                 continue
 
-            # Glättungsperiode definieren (Pandas Resampling Rule)
-            resample_rule = f'{values_period_m}T'
-            
-            # Resampling-Operation
-            if interpolation_method == "min":
-                df_resampled = df_raw[db_col].resample(resample_rule).min()
-            else: 
-                df_resampled = df_raw[db_col].resample(resample_rule).mean()
-
-            # Lineare Interpolation für Datenlücken nach dem Resampling
-            df_resampled = df_resampled.interpolate(method='linear')
-            
-            # Statistik (basiert auf den resampelten/geglätteten Daten)
-            stats = {
+            all_data.append({
                 'sensor': db_col,
-                'unit': unit,
-                'min': df_resampled.min(),
-                'max': df_resampled.max(),
-                'mean': df_resampled.mean()
-            }
-            all_data.append(stats)
-            
-            # Füge die resampelten Daten dem Plot-DataFrame hinzu
-            df_plot[db_col] = df_resampled
+                'unit': sensor_spec['unit'],
+                'min': col_stats.at['min', db_col],
+                'max': col_stats.at['max', db_col],
+                'mean': col_stats.at['mean', db_col],
+            })
             
         # 4. Plot erstellen (Matplotlib)
         
         ensure_dir_exists(log_path) 
         
-        fig, ax = plt.subplots(figsize=(14, 8)) 
+        # gemeinsame Figure leeren (Linien, Titel, Achsen und Statistik-Text des letzten Berichts)
+        ax.cla()
+        fig.texts.clear()
         
-        # Plotten der einzelnen Sensor-Linien
+        # Plotten der einzelnen Sensor-Linien (Statistik oben bleibt auf den vollen Daten)
+        df_plot = downsample_for_plot(df_plot, fig, 'min' if interpolation_method == "min" else 'mean')
         for sensor_spec in report_config['sensors']:
             db_col = config.COLUMN_NAMES.get(sensor_spec['key'])
             unit = sensor_spec['unit']
@@ -197,12 +300,8 @@ def fetch_and_plot_report(report_config):
         ax.set_xlabel(f"Zeit (Lokal {local_tz.zone})", fontsize=12)
         ax.set_ylabel(f"Messwert (Einheit: {report_config['sensors'][0]['unit']})", fontsize=12)
 
-        # X-Achsen-Formatierung
-        date_format = '%d.%m %H:%M'
-        if duration_days > 7:
-             date_format = '%d.%m.%Y'
-        
-        ax.xaxis.set_major_formatter(mdates.DateFormatter(date_format))
+        # X-Achsen-Formatierung (Formatter aus prepare_report)
+        ax.xaxis.set_major_formatter(report_config['_date_formatter'])
         fig.autofmt_xdate(rotation=30)
         ax.grid(True, linestyle='--', alpha=0.7)
         ax.legend(loc='best')
@@ -219,17 +318,17 @@ def fetch_and_plot_report(report_config):
             stats_text += f"   - Max: {max_val}{data['unit']} \n"
             stats_text += f"   - Mittelwert: {mean_val}{data['unit']} \n\n"
 
-        plt.figtext(0.95, 0.5, stats_text, 
+        fig.text(0.95, 0.5, stats_text, 
                     wrap=True, 
                     horizontalalignment='left', 
                     verticalalignment='center',
                     fontsize=10, 
                     bbox={'facecolor':'#F0F0F0', 'alpha':0.8, 'pad':5, 'edgecolor':'gray'})
         
-        plt.tight_layout(rect=[0, 0, 0.88, 1]) 
+        fig.tight_layout(rect=[0, 0, 0.88, 1]) 
         
-        plt.savefig(full_file_path, format='pdf')
-        plt.close(fig)
+        fig.savefig(full_file_path, format='pdf')
+        register_pdf_file(log_path, full_file_path)
 
         print(f"   ✅ Bericht erfolgreich erstellt und gespeichert als: {full_file_path}")
 
@@ -241,9 +340,21 @@ def fetch_and_plot_report(report_config):
         print(f"   ❌ Datenbankfehler für Bericht {report_id}: {e}")
     except Exception as e:
         print(f"   ❌ Allgemeiner Fehler bei der Berichtserstellung für {report_id}: {e}")
-    finally:
-        if conn:
-            conn.close()
+
+# --- Worker (ein Prozess pro Kern, jeder mit eigener DB-Verbindung und Figure) ---
+
+_worker_conn = None
+_worker_fig = None
+_worker_ax = None
+
+def _init_worker():
+    """Pro Worker-Prozess einmal: DB-Verbindung und Figure anlegen (werden nicht gepickelt)."""
+    global _worker_conn, _worker_fig, _worker_ax
+    _worker_conn = open_db()
+    _worker_fig, _worker_ax = new_figure()
+
+def _run_report(report):
+    fetch_and_plot_report(report, _worker_fig, _worker_ax, _worker_conn)
 
 # --- Hauptfunktion ---
 
@@ -251,8 +362,7 @@ def main():
     """Liest die Konfiguration und startet die Berichtsgenerierung."""
     
     try:
-        with open(config.REPORTS_CONFIG_FILE, 'r') as f:
-            reports_config_list = json.load(f)
+        reports_config_list = load_reports_config(config.REPORTS_CONFIG_FILE)
             
     except FileNotFoundError:
         print(f"FATAL ERROR: Konfigurationsdatei {config.REPORTS_CONFIG_FILE} nicht gefunden.")
@@ -263,10 +373,34 @@ def main():
 
     print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Starte Berichtsgenerator für {len(reports_config_list)} Berichte.")
 
-    for report in reports_config_list:
-        fetch_and_plot_report(report)
+    # Eine DB-Verbindung für alle Berichte (Schema-Parsing, PRAGMAs und mmap nur einmal)
+    try:
+        conn = open_db()
+        ensure_indexes(conn, config.COLUMN_NAMES['timestamp_iso'])
+    except sqlite3.Error as e:
+        print(f"FATAL ERROR: Datenbank {config.DB_FILE} konnte nicht geöffnet werden: {e}")
+        sys.exit(1)
+
+    workers = REPORT_WORKERS or min(len(reports_config_list), os.cpu_count() or 1)
+
+    if workers > 1:
+        # Berichte sind unabhängig (eigener Zeitraum, eigene PDF) -> echte Parallelität über Prozesse;
+        # jeder Worker öffnet seine eigene Verbindung/Figure in _init_worker
+        conn.close()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as ex:
+            list(ex.map(_run_report, reports_config_list))
+    else:
+        # Eine Figure für alle Berichte (Figure-/Achsen-Aufbau und Font-Lookup nur einmal)
+        # (nicht bei pyplot registriert -> kein plt.close nötig)
+        fig, ax = new_figure()
+        try:
+            for report in reports_config_list:
+                fetch_and_plot_report(report, fig, ax, conn)
+        finally:
+            conn.close()
 
     print("\nAlle Berichte verarbeitet. Generator beendet.")
 
 if __name__ == "__main__":
+    freeze_support()
     main()
\ No newline at end of file